@@ -2,7 +2,9 @@
 Configuration and OpenAI client setup
 """
 import os
-from openai import OpenAI
+import threading
+import httpx
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -21,6 +23,77 @@ GPT_TEMPERATURE = 0.0
 # Language settings
 TRANSCRIPTION_LANGUAGE = "en"  # English only
 
+# Whisper backend: "openai" (API) or "local" (faster-whisper / CTranslate2, optional dependency)
+WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "openai").strip().lower()
+WHISPER_LOCAL_MODEL = os.getenv("WHISPER_LOCAL_MODEL", "large-v3")
+WHISPER_LOCAL_DEVICE = os.getenv("WHISPER_LOCAL_DEVICE", "auto")  # auto, cpu or cuda
+WHISPER_LOCAL_COMPUTE_TYPE = os.getenv("WHISPER_LOCAL_COMPUTE_TYPE", "int8")  # e.g. int8_float16 on GPU
+# Local backend: decode this many 30s windows per batch (faster-whisper BatchedInferencePipeline).
+# 0 = sequential decoding. Batching pays off mostly on GPU.
+WHISPER_LOCAL_BATCH_SIZE = int(os.getenv("WHISPER_LOCAL_BATCH_SIZE", "0"))
+
+# Audio longer than this (seconds) is split into WHISPER_CHUNK_SEC pieces that are transcribed
+# in parallel (needs ffmpeg/ffprobe on PATH). 0 = always send the whole file in one request.
+WHISPER_CHUNK_THRESHOLD_SEC = float(os.getenv("WHISPER_CHUNK_THRESHOLD_SEC", "60"))
+WHISPER_CHUNK_SEC = float(os.getenv("WHISPER_CHUNK_SEC", "30"))
+# Neighbouring chunks share this many seconds so words at a cut are heard whole by one of them;
+# the doubled segments/words are dropped when the chunks are stitched back together.
+WHISPER_CHUNK_OVERLAP_SEC = float(os.getenv("WHISPER_CHUNK_OVERLAP_SEC", "2"))
+
+# A recording is rejected as "no speech" when every Whisper segment has no_speech_prob above
+# NO_SPEECH_PROB_THRESHOLD and avg_logprob below NO_SPEECH_LOGPROB_THRESHOLD (Whisper's own rule)
+NO_SPEECH_PROB_THRESHOLD = float(os.getenv("NO_SPEECH_PROB_THRESHOLD", "0.6"))
+NO_SPEECH_LOGPROB_THRESHOLD = float(os.getenv("NO_SPEECH_LOGPROB_THRESHOLD", "-1.0"))
+
+# Max Whisper requests in flight per process; extra requests wait their turn
+WHISPER_CONCURRENCY = max(1, int(os.getenv("WHISPER_CONCURRENCY", "8")))
+# Max GPT recommendations calls in flight per process (same idea as WHISPER_CONCURRENCY)
+RECOMMENDATIONS_CONCURRENCY = max(1, int(os.getenv("RECOMMENDATIONS_CONCURRENCY", "8")))
+# Max TTS requests in flight per process (same idea as WHISPER_CONCURRENCY)
+TTS_CONCURRENCY = max(1, int(os.getenv("TTS_CONCURRENCY", "8")))
+
+# One combined GPT call for fillers + improved text + relevance instead of three separate calls
+# (transcript sent once; fewer round trips). Off by default: separate prompts are the tuned path.
+GPT_COMBINED_ANALYSIS = os.getenv("GPT_COMBINED_ANALYSIS", "false").strip().lower() in ("1", "true", "yes")
+
+# Answers with fewer words than this skip the relevance check and improved-text GPT calls
+MIN_WORDS_FOR_GPT = int(os.getenv("MIN_WORDS_FOR_GPT", "5"))
+# Filler-free answers shorter than this are returned as improved_text unchanged (no rewrite call)
+IMPROVE_SKIP_CLEAN_MAX_WORDS = int(os.getenv("IMPROVE_SKIP_CLEAN_MAX_WORDS", "20"))
+# Answers shorter than this with no hesitation sound, stutter or filler-lexicon word skip the
+# filler-detection GPT call (nothing for it to find; 0 = always call GPT)
+FILLER_SKIP_MAX_WORDS = int(os.getenv("FILLER_SKIP_MAX_WORDS", "20"))
+
+# Directory for uploaded audio temp files (None = system temp dir). Point it at a tmpfs
+# such as /dev/shm to keep uploads in RAM; size the tmpfs for concurrent uploads.
+AUDIO_TEMP_DIR = os.getenv("AUDIO_TEMP_DIR") or None
+
+# Largest accepted audio upload (MB; 0 = no limit). Long audio is chunked for Whisper, so
+# this may exceed the API's 25 MB per-request limit.
+MAX_UPLOAD_MB = float(os.getenv("MAX_UPLOAD_MB", "50"))
+MAX_UPLOAD_BYTES = int(MAX_UPLOAD_MB * 1024 * 1024)
+
+# Number of full /transcribe responses kept in memory, keyed by audio content hash (0 = disabled).
+# They expire after GPT_CACHE_TTL_SEC; responses where a GPT call fell back are not kept.
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+
+# Whisper transcripts cached by (audio hash, backend, model, language), so re-uploads with a
+# different title/level skip transcription. TRANSCRIPT_CACHE_DIR persists them across restarts
+# (needs diskcache); unset = memory only.
+TRANSCRIPT_CACHE_SIZE = int(os.getenv("TRANSCRIPT_CACHE_SIZE", "1024"))
+TRANSCRIPT_CACHE_DIR = os.getenv("TRANSCRIPT_CACHE_DIR") or None
+
+# GPT filler / improved-text / relevance results cached by transcript hash (0 = disabled)
+GPT_CACHE_SIZE = int(os.getenv("GPT_CACHE_SIZE", "1024"))
+GPT_CACHE_TTL_SEC = float(os.getenv("GPT_CACHE_TTL_SEC", "3600"))
+# GPT recommendations cached by bucketed metrics (WPM/10, fillers and hesitations per 100 words,
+# pause ratio/0.05, rating); same TTL as above (0 = disabled)
+RECOMMENDATIONS_CACHE_SIZE = int(os.getenv("RECOMMENDATIONS_CACHE_SIZE", "4096"))
+# TTS audio (MP3 bytes) cached by (model, voice, text hash), so recurring phrases skip the
+# OpenAI call. TTS_CACHE_DIR persists them across restarts (needs diskcache); 0 = disabled
+TTS_CACHE_SIZE = int(os.getenv("TTS_CACHE_SIZE", "256"))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR") or None
+
 # Whisper prompt to preserve filler words and hesitations with maximum fidelity
 # CRITICAL: This is the most important setting for accurate spoken English transcription
 WHISPER_PROMPT = (
@@ -42,33 +115,111 @@ WHISPER_PROMPT = (
     "DO NOT remove, skip, or clean up filler words. Transcribe EVERYTHING spoken, exactly as spoken."
 )
 
+# Shared HTTP connection pool for OpenAI calls. Whisper uploads are large, so keep plenty
+# of warm keepalive connections; HTTP/2 (multiplexing) is used when the h2 package is installed.
+OPENAI_TIMEOUT_SEC = float(os.getenv("OPENAI_TIMEOUT_SEC", "120"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "200"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "100"))
+# Idle seconds before a pooled connection is closed (httpx default is 5, which drops warm
+# TLS connections between bursts of traffic)
+OPENAI_KEEPALIVE_EXPIRY_SEC = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY_SEC", "60"))
+# SDK retries (exponential backoff) on 429 / 5xx / connection errors before a call fails
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+
 # Lazy initialization of OpenAI client
 _openai_client = None
 
-def get_openai_client() -> OpenAI:
+def _build_http_client() -> httpx.AsyncClient:
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        http2 = False
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=httpx.Timeout(OPENAI_TIMEOUT_SEC, connect=5.0),
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY_SEC,
+        ),
+    )
+
+def get_openai_client() -> AsyncOpenAI:
     """
-    Get or create OpenAI client (lazy initialization)
+    Get or create the async OpenAI client (lazy initialization)
     This prevents initialization errors during import
-    Handles httpx compatibility issues
+    Passing our own httpx client also avoids the SDK's httpx "proxies" incompatibility
     """
     global _openai_client
     if _openai_client is None:
-        try:
-            # Try to create client with default settings
-            _openai_client = OpenAI(api_key=API_KEY)
-        except (TypeError, ValueError) as e:
-            if 'proxies' in str(e) or 'unexpected keyword' in str(e).lower():
-                # Fallback: create client with custom httpx client to avoid proxies issue
-                import httpx
-                # Create a custom httpx client
-                http_client = httpx.Client(
-                    timeout=httpx.Timeout(60.0, connect=10.0)
-                )
-                _openai_client = OpenAI(
-                    api_key=API_KEY,
-                    http_client=http_client
-                )
-            else:
-                raise
+        _openai_client = AsyncOpenAI(
+            api_key=API_KEY,
+            http_client=_build_http_client(),
+            max_retries=OPENAI_MAX_RETRIES,
+        )
     return _openai_client
 
+# Which param name the OpenAI client accepts (old client = max_tokens, new = max_completion_tokens)
+_max_tokens_param = None
+
+def max_tokens_kwargs(n: int) -> dict:
+    """Return kwargs for token limit: works with both old (max_tokens) and new (max_completion_tokens) OpenAI client."""
+    global _max_tokens_param
+    if _max_tokens_param is None:
+        import inspect
+        sig = inspect.signature(get_openai_client().chat.completions.create)
+        _max_tokens_param = "max_completion_tokens" if "max_completion_tokens" in sig.parameters else "max_tokens"
+    return {_max_tokens_param: n}
+
+async def close_openai_client() -> None:
+    """Close the OpenAI client's connection pool (app shutdown)."""
+    global _openai_client
+    if _openai_client is not None:
+        await _openai_client.close()
+        _openai_client = None
+
+
+# Lazy initialization of the local Whisper model (WHISPER_BACKEND=local). First use happens in
+# worker threads (asyncio.to_thread), so the lock makes concurrent first requests load it once.
+_local_whisper_model = None
+_local_whisper_lock = threading.Lock()
+
+def get_local_whisper_model():
+    """
+    Get or load the faster-whisper model (lazy: weights are loaded on first use)
+    Raises RuntimeError if faster-whisper is not installed
+    """
+    global _local_whisper_model
+    if _local_whisper_model is None:
+        with _local_whisper_lock:
+            if _local_whisper_model is None:
+                try:
+                    from faster_whisper import WhisperModel
+                except ImportError as e:
+                    raise RuntimeError("WHISPER_BACKEND=local requires faster-whisper (pip install faster-whisper)") from e
+                _local_whisper_model = WhisperModel(
+                    WHISPER_LOCAL_MODEL,
+                    device=WHISPER_LOCAL_DEVICE,
+                    compute_type=WHISPER_LOCAL_COMPUTE_TYPE,
+                )
+    return _local_whisper_model
+
+_local_whisper_pipeline = None
+
+def get_local_whisper_pipeline():
+    """
+    Get the batched faster-whisper pipeline around the local model (WHISPER_LOCAL_BATCH_SIZE > 0)
+    Returns None if the installed faster-whisper has no BatchedInferencePipeline (< 1.1)
+    """
+    global _local_whisper_pipeline
+    if _local_whisper_pipeline is None:
+        try:
+            from faster_whisper import BatchedInferencePipeline
+        except ImportError:
+            return None
+        model = get_local_whisper_model()  # takes the lock itself; load outside it
+        with _local_whisper_lock:
+            if _local_whisper_pipeline is None:
+                _local_whisper_pipeline = BatchedInferencePipeline(model=model)
+    return _local_whisper_pipeline
@@ -1,10 +1,13 @@
 """
 Main FastAPI application entry point
 """
+import asyncio
 import logging
 import sys
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from config import get_openai_client, close_openai_client, MAX_UPLOAD_BYTES
 from routes.transcription import router as transcription_router
 
 # Text logging to console (when running server without Docker)
@@ -22,8 +25,9 @@ logger.info("Logging configured (stdout)")
 app = FastAPI(
     title="Voice Transcription & Filler Word Detection API",
     description="API for transcribing audio to text and detecting filler words using AI",
-    version="1.0.0"
-)  
+    version="1.0.0",
+    default_response_class=ORJSONResponse,  # orjson: much faster encoding of the ~30-field response
+)
 
 # CORS middleware
 app.add_middleware(
@@ -34,9 +38,68 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Multipart framing and form fields on top of the audio itself
+_FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject requests whose Content-Length is over MAX_UPLOAD_BYTES with 413 before the body
+    is read or parsed. Plain ASGI (not BaseHTTPMiddleware) so streamed responses pass through
+    untouched. Chunked uploads without Content-Length are capped in the route while saving.
+    """
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and self.max_bytes:
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    if value.isdigit() and int(value) > self.max_bytes + _FORM_OVERHEAD_BYTES:
+                        response = ORJSONResponse(
+                            {"detail": f"Audio file too large. Maximum size is {self.max_bytes // (1024 * 1024)} MB."},
+                            status_code=413,
+                        )
+                        await response(scope, receive, send)
+                        return
+                    break
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=MAX_UPLOAD_BYTES)
+
 # Include routers
 app.include_router(transcription_router)
 
+_background_tasks = set()
+
+
+async def _warm_openai_connection() -> None:
+    """Open the TLS connection to OpenAI so the first request doesn't pay for the handshake."""
+    try:
+        await get_openai_client().models.list()
+        logger.info("OpenAI connection warmed up")
+    except Exception as e:
+        logger.warning("OpenAI warmup failed (first request will connect): %s", e)
+
+
+@app.on_event("startup")
+async def warm_up():
+    """Create the OpenAI client up front and prime its connection pool in the background."""
+    get_openai_client()
+    task = asyncio.create_task(_warm_openai_connection())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+@app.on_event("shutdown")
+async def shut_down():
+    """Release pooled OpenAI connections."""
+    await close_openai_client()
+
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -50,6 +113,18 @@ async def root():
 
 
 if __name__ == "__main__":
+    import os
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Import string (not the app object) so uvicorn can spawn worker processes.
+    # loop/http "auto" pick uvloop and httptools when installed (uvicorn[standard]).
+    # Each worker keeps its own caches and Whisper limit, so stay at one worker unless
+    # WEB_CONCURRENCY asks for more.
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        loop="auto",
+        http="auto",
+    )
 
@@ -2,27 +2,59 @@
 Transcription API endpoints
 """
 import os
-import re
+import asyncio
+import contextlib
+import hashlib
 import logging
+import tempfile
+from typing import Any, AsyncIterator
+import orjson
 from fastapi import APIRouter, File, UploadFile, HTTPException, Form
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
 logger = logging.getLogger(__name__)
+from config import (
+    RESPONSE_CACHE_SIZE,
+    GPT_CACHE_TTL_SEC,
+    TRANSCRIPT_CACHE_SIZE,
+    TRANSCRIPT_CACHE_DIR,
+    AUDIO_TEMP_DIR,
+    MAX_UPLOAD_BYTES,
+    WHISPER_BACKEND,
+    WHISPER_MODEL,
+    WHISPER_LOCAL_MODEL,
+    TRANSCRIPTION_LANGUAGE,
+    MIN_WORDS_FOR_GPT,
+    IMPROVE_SKIP_CLEAN_MAX_WORDS,
+    GPT_COMBINED_ANALYSIS,
+)
 from models.schemas import TranscriptionResponse
-from services.transcription import transcribe_audio_file
+from services.cache import LRUCache, PersistentLRUCache, track_fallbacks
+from services.transcription import transcribe_audio_file, whisper_queue_stats
 from services.filler_detection import (
     detect_filler_words_with_gpt,
     remove_filler_words,
     generate_improved_text,
     check_answer_relevance_to_title,
+    analyze_transcript,
+    gpt_result_cache,
     OFF_TOPIC_MESSAGE,
 )
-from services.wpm_calculation import calculate_wpm
+from services.wpm_calculation import calculate_wpm, count_words
 from services.pause_analysis import analyze_pauses_and_hesitations, calculate_fluency_score
-from services.confidence_analysis import calculate_confidence_score
+from services.confidence_analysis import calculate_confidence_metrics, calculate_confidence_score, recommendations_cache
 # from services.tts import text_to_speech  # TTS disabled: do not return AI voice
 
+# Optional: SIMD BLAKE3 for the upload content hash (falls back to hashlib's blake2b)
+try:
+    from blake3 import blake3 as _content_hasher
+except ImportError:
+    def _content_hasher():
+        return hashlib.blake2b(digest_size=16)
+
 # Supported audio formats by OpenAI Whisper
-SUPPORTED_AUDIO_FORMATS = {
+SUPPORTED_AUDIO_FORMATS = frozenset({
     'audio/mpeg',  # MP3
     'audio/wav',  # WAV
     'audio/x-m4a',  # M4A
@@ -31,7 +63,24 @@ SUPPORTED_AUDIO_FORMATS = {
     'audio/flac',  # FLAC
     'audio/webm',  # WebM
     'audio/x-aac',  # AAC
-}
+})
+
+# File extensions accepted when the client sends no content type
+SUPPORTED_EXTENSIONS = frozenset({"mp3", "wav", "m4a", "ogg", "flac", "webm", "aac", "mp4"})
+
+# Uploads are copied to disk in chunks of this size so memory stays O(chunk)
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+# Full responses keyed by (audio content hash, level, category, title); re-submitting
+# the same recording skips Whisper and GPT entirely. Same TTL as the GPT results they
+# contain; responses where a GPT call fell back (degraded) are never stored.
+_response_cache = LRUCache(maxsize=RESPONSE_CACHE_SIZE, ttl=GPT_CACHE_TTL_SEC)
+# Whisper results by audio content hash: retries and re-uploads with a different level/title skip transcription
+_transcript_cache = PersistentLRUCache(maxsize=TRANSCRIPT_CACHE_SIZE, directory=TRANSCRIPT_CACHE_DIR)
+_WHISPER_CACHE_TAG = (WHISPER_BACKEND, WHISPER_LOCAL_MODEL if WHISPER_BACKEND == "local" else WHISPER_MODEL, TRANSCRIPTION_LANGUAGE)
+
+# GPT calls (relevance check / improved text) skipped because the answer was too short to judge
+_gpt_calls_skipped = 0
 
 router = APIRouter(prefix="/api/v1", tags=["transcription"])
 
@@ -52,51 +101,208 @@ async def root():
 
 @router.get("/health")
 async def health():
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "transcription-api"}
+    """Health check endpoint (includes Whisper queue depth for monitoring)"""
+    return {
+        "status": "healthy",
+        "service": "transcription-api",
+        "whisper": whisper_queue_stats(),
+        "gpt_calls_skipped": _gpt_calls_skipped,
+        "gpt_cache": gpt_result_cache.stats(),
+        "recommendations_cache": recommendations_cache.stats(),
+    }
 
 
 def _validate_file_type(file: UploadFile) -> None:
     """Raise HTTPException if file type is not supported."""
     if not file.content_type:
         if file.filename:
-            ext = file.filename.lower().split(".")[-1]
-            if ext not in {"mp3", "wav", "m4a", "ogg", "flac", "webm", "aac", "mp4"}:
+            ext = os.path.splitext(file.filename)[1].lower().lstrip(".")
+            if ext not in SUPPORTED_EXTENSIONS:
                 raise HTTPException(status_code=400, detail="Unsupported file format. Supported: MP3, WAV, M4A, OGG, FLAC, WebM, AAC")
+            return
         else:
             raise HTTPException(status_code=400, detail="File type could not be determined.")
     if file.content_type not in SUPPORTED_AUDIO_FORMATS and not file.content_type.startswith("audio/"):
         raise HTTPException(status_code=400, detail=f"Unsupported audio format: {file.content_type}. Supported: MP3, WAV, M4A, OGG, FLAC, WebM, AAC")
 
 
-async def _run_pipeline(
+def _create_temp_file(filename: str | None) -> tuple[int, str]:
+    """
+    Create a unique temp file for an upload. Only the extension of the client's
+    filename is kept (Whisper uses it to detect the format); the name itself is
+    never used as a path.
+    Returns (fd, path).
+    """
+    suffix = os.path.splitext(filename or "")[1].lower()
+    return tempfile.mkstemp(suffix=suffix, dir=AUDIO_TEMP_DIR)
+
+
+def _remove_temp_file(path: str | None) -> None:
+    """Delete an upload temp file; one unlink, already-gone is fine."""
+    if path:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+
+
+def _upload_too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Audio file too large. Maximum size is {MAX_UPLOAD_BYTES // (1024 * 1024)} MB.")
+
+
+async def _save_upload(file: UploadFile, fd: int) -> tuple[int, str]:
+    """
+    Stream the uploaded file into the open temp file `fd` chunk by chunk, hashing it on the way.
+    Disk writes and hashing run in a worker thread so the event loop is never blocked on them.
+    Returns (bytes written, content digest) — the digest is the response cache key.
+    Raises 413 once the upload exceeds MAX_UPLOAD_BYTES.
+    """
+    size = 0
+    hasher = _content_hasher()
+
+    def write_chunk(f, chunk: bytes) -> None:
+        f.write(chunk)
+        hasher.update(chunk)
+
+    # Take ownership of fd first, so it is closed on the early 413 as well
+    with os.fdopen(fd, "wb") as f:
+        if MAX_UPLOAD_BYTES and file.size is not None and file.size > MAX_UPLOAD_BYTES:
+            raise _upload_too_large()
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if MAX_UPLOAD_BYTES and size > MAX_UPLOAD_BYTES:
+                raise _upload_too_large()
+            await asyncio.to_thread(write_chunk, f, chunk)
+    return size, hasher.hexdigest()
+
+
+@contextlib.asynccontextmanager
+async def _uploaded_temp_file(file: UploadFile) -> AsyncIterator[tuple[str, int, str]]:
+    """
+    Save the upload to a temp file for the duration of the block; yields (path, size, digest).
+    The file is removed on every exit path, with the unlink run off the event loop.
+    """
+    fd, path = await asyncio.to_thread(_create_temp_file, file.filename)
+    try:
+        size, digest = await _save_upload(file, fd)
+        logger.info("Saved temp file size=%d bytes path=%s", size, path)
+        yield path, size, digest
+    finally:
+        await asyncio.to_thread(_remove_temp_file, path)
+
+
+async def _pipeline_stages(
     temp_file_path: str,
     level: str | None,
     category: str | None,
     title: str | None,
-) -> dict:
+    digest: str | None = None,
+) -> AsyncIterator[tuple[str, dict]]:
     """
-    Run transcribe -> filler -> wpm -> pause -> fluency -> confidence.
-    Returns dict with text, duration_seconds, segments, filler_words, cleaned_text,
-    wpm_data, pause_data, fluency_data, confidence_data.
+    Run transcribe -> filler (+ relevance) -> wpm -> pause -> fluency -> confidence (+ improved text),
+    yielding (stage, payload) as each stage finishes so callers can stream partial results.
+    Stages: "transcription", "filler_words", "analysis", "scores", "improved_text", then "done"
+    with the full pipeline dict
+    (text, duration_seconds, segments, filler_words, cleaned_text, wpm_data, pause_data,
+    fluency_data, confidence_data, improved_text, off_topic, degraded).
+    degraded is True when any GPT call fell back (the result must not be cached).
+    Independent GPT calls are overlapped: filler detection runs alongside the relevance
+    check, and improved-text generation runs alongside confidence recommendations.
+    `digest` (audio content hash) enables the transcript cache.
     Raises HTTPException on language/empty/duration.
     """
-    transcription_result = await transcribe_audio_file(temp_file_path)
+    transcript_key = (digest, *_WHISPER_CACHE_TAG) if digest else None
+    transcription_result = _transcript_cache.get(transcript_key) if transcript_key else None
+    if transcription_result is None:
+        transcription_result = await transcribe_audio_file(temp_file_path)
+        if transcript_key:
+            _transcript_cache.set(transcript_key, transcription_result)
+    else:
+        logger.info("Transcript cache hit | digest=%s", digest)
     text = transcription_result["text"]
     duration_seconds = transcription_result["duration_seconds"]
     segments = transcription_result.get("segments")
     detected_language = (transcription_result.get("language") or "").strip().lower()
 
+    if transcription_result.get("no_speech"):
+        raise HTTPException(status_code=400, detail="No speech detected in the audio. Please try again with a clear recording.")
     if detected_language and detected_language not in ("en", "english"):
         raise HTTPException(status_code=400, detail="Please speak in English. Other languages are not accepted.")
     if not (text and text.strip()):
         raise HTTPException(status_code=400, detail="No speech detected in the audio. Please try again with a clear recording.")
     if duration_seconds <= 0:
         raise HTTPException(status_code=400, detail="Could not determine audio duration. Please try again with a valid recording.")
+    yield "transcription", {"text": text, "duration_seconds": duration_seconds}
+
+    # Too few words to judge relevance or rewrite: skip those GPT calls (scoring still runs)
+    word_count = count_words(text)
+    too_short = word_count < MIN_WORDS_FOR_GPT
+
+    # Before the GPT tasks are created, so they record into the same list
+    fallbacks = track_fallbacks()
+    filler_task = relevance_task = combined_task = None
+    if GPT_COMBINED_ANALYSIS and not too_short:
+        # Fillers, improved text and relevance from a single GPT call
+        combined_task = asyncio.create_task(analyze_transcript(text, level=level, category=category, title=title))
+    else:
+        # Both GPT calls only need the transcript: start them together
+        filler_task = asyncio.create_task(detect_filler_words_with_gpt(text))
+        if title and title.strip() and not too_short:
+            relevance_task = asyncio.create_task(check_answer_relevance_to_title(title.strip(), text))
+    try:
+        async for stage in _analysis_stages(
+            text, duration_seconds, segments, filler_task, relevance_task, level, category, title, too_short,
+            combined_task, word_count, fallbacks,
+        ):
+            yield stage
+    finally:
+        # Client went away mid-stream (or a stage failed): don't leave GPT calls running
+        for task in (filler_task, relevance_task, combined_task):
+            if task is not None and not task.done():
+                task.cancel()
+
+
+def _off_topic_scores(scores: dict) -> dict:
+    """Off-topic answers: scores halved (overall capped at 40, components at 50) and rated Low."""
+    return {
+        **scores,
+        "confidence_score": round(min(scores["confidence_score"] * 0.5, 40.0), 2),
+        "wpm_score": round(min(scores["wpm_score"] * 0.5, 50.0), 2),
+        "filler_score": round(min(scores["filler_score"] * 0.5, 50.0), 2),
+        "pause_score": round(min(scores["pause_score"] * 0.5, 50.0), 2),
+        "hesitation_score": round(min(scores["hesitation_score"] * 0.5, 50.0), 2),
+        "overall_rating": "Low",
+    }
 
-    filler_words, word_count_gpt = await detect_filler_words_with_gpt(text)
+
+async def _analysis_stages(
+    text: str,
+    duration_seconds: float,
+    segments: Any,
+    filler_task: "asyncio.Task | None",
+    relevance_task: "asyncio.Task | None",
+    level: str | None,
+    category: str | None,
+    title: str | None,
+    too_short: bool = False,
+    combined_task: "asyncio.Task | None" = None,
+    word_count: int | None = None,
+    fallbacks: list | None = None,
+) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Stages after transcription; see _pipeline_stages.
+    With combined_task (analyze_transcript) fillers, relevance and improved text all come from it.
+    word_count is count_words(text) when the caller has already tokenized the transcript.
+    fallbacks is the track_fallbacks() list the GPT calls record into (sets "degraded").
+    """
+    global _gpt_calls_skipped
+    wpm_data = calculate_wpm(text, duration_seconds, word_count=word_count)
+    combined = None
+    if combined_task is not None:
+        combined = await combined_task
+        filler_words, word_count_gpt = combined["filler_words"], combined["word_count"]
+    else:
+        filler_words, word_count_gpt = await filler_task
     cleaned_text = remove_filler_words(text, filler_words)
-    wpm_data = calculate_wpm(text, duration_seconds)
+    yield "filler_words", {"filler_words": filler_words, "filler_count": len(filler_words), "cleaned_text": cleaned_text}
     wpm_data["word_count"] = word_count_gpt
     wpm_data["wpm"] = round((word_count_gpt / duration_seconds) * 60, 2) if duration_seconds > 0 else 0.0
 
@@ -108,20 +314,64 @@ async def _run_pipeline(
         word_count=wpm_data["word_count"],
         filler_count=len(filler_words),
     )
-    confidence_data = await calculate_confidence_score(
+    yield "analysis", {**wpm_data, **pause_data, **fluency_data}
+
+    off_topic = False
+    if too_short and title and title.strip():
+        # Same leniency as check_answer_relevance_to_title: very short answers are not off-topic
+        _gpt_calls_skipped += 1
+    if relevance_task is not None or (combined is not None and title and title.strip()):
+        is_relevant = combined["is_relevant"] if combined is not None else await relevance_task
+        off_topic = not is_relevant
+        logger.info("Relevance check | title=%s relevant=%s off_topic=%s", title[:40], is_relevant, off_topic)
+
+    score_inputs = dict(
         wpm=wpm_data["wpm"],
         filler_count=len(filler_words),
         word_count=wpm_data["word_count"],
-        total_pauses=pause_data["total_pauses"],
         total_hesitations=pause_data["total_hesitations"],
         pause_ratio=fluency_data["pause_ratio"],
         hesitation_rate=fluency_data["hesitation_rate"],
         fluency_score=fluency_data["fluency_score"],
+    )
+    # Scores are pure arithmetic: send them before waiting on any GPT call
+    # (with the same off-topic penalty the final response applies)
+    scores = calculate_confidence_metrics(**score_inputs)
+    if off_topic:
+        scores = _off_topic_scores(scores)
+    yield "scores", {**scores, "off_topic": off_topic}
+
+    # Recommendations (GPT) run alongside the improved-text call
+    confidence_task = asyncio.create_task(calculate_confidence_score(
+        **score_inputs,
+        total_pauses=pause_data["total_pauses"],
         level=level,
         category=category,
         title=title,
-    )
-    return {
+    ))
+    try:
+        if off_topic:
+            improved_text = OFF_TOPIC_MESSAGE
+        elif combined is not None:
+            improved_text = combined["improved_text"]
+        elif too_short or not cleaned_text.strip():
+            # Nothing worth rewriting (a few words, or only fillers): return the cleaned text as is
+            _gpt_calls_skipped += 1
+            logger.info("Short answer (%d words) -> skipped improved-text GPT call", wpm_data["word_count"])
+            improved_text = cleaned_text
+        elif not filler_words and wpm_data["word_count"] < IMPROVE_SKIP_CLEAN_MAX_WORDS:
+            # Short and already filler-free: little for a rewrite to add
+            _gpt_calls_skipped += 1
+            logger.info("Filler-free answer (%d words) -> skipped improved-text GPT call", wpm_data["word_count"])
+            improved_text = cleaned_text
+        else:
+            improved_text = await generate_improved_text(cleaned_text, level=level, category=category, title=title)
+        yield "improved_text", {"improved_text": improved_text}
+        confidence_data = await confidence_task
+    finally:
+        if not confidence_task.done():
+            confidence_task.cancel()
+    yield "done", {
         "text": text,
         "duration_seconds": duration_seconds,
         "segments": segments,
@@ -131,9 +381,89 @@ async def _run_pipeline(
         "pause_data": pause_data,
         "fluency_data": fluency_data,
         "confidence_data": confidence_data,
+        "improved_text": improved_text,
+        "off_topic": off_topic,
+        "degraded": bool(fallbacks),
     }
 
 
+async def _run_pipeline(
+    temp_file_path: str,
+    level: str | None,
+    category: str | None,
+    title: str | None,
+    digest: str | None = None,
+) -> dict:
+    """Run the whole pipeline and return the final dict from _pipeline_stages."""
+    async for stage, payload in _pipeline_stages(temp_file_path, level, category, title, digest):
+        if stage == "done":
+            return payload
+    raise RuntimeError("Pipeline finished without a result")
+
+
+def _build_response(data: dict, level: str | None, category: str | None, title: str | None) -> TranscriptionResponse:
+    """
+    Turn a pipeline result into the API response. Off-topic answers get their scores
+    halved and capped, and topic-focused recommendations.
+    """
+    filler_words = data["filler_words"]
+    wpm_data = data["wpm_data"]
+    pause_data = data["pause_data"]
+    fluency_data = data["fluency_data"]
+    confidence_data = data["confidence_data"]
+    if data["off_topic"]:
+        confidence_data = {
+            **_off_topic_scores(confidence_data),
+            "recommendations": [
+                f"Try to address the challenge topic: \"{title}\". Speak about the question or key points related to it instead of going off-topic.",
+                "Your response was not related to the given challenge. Next time, stay on topic to get a proper score and feedback.",
+            ],
+        }
+    return TranscriptionResponse(
+        text=data["text"],
+        improved_text=data["improved_text"],
+        tts_speech=None,
+        level=level,
+        category=category,
+        title=title,
+        filler_words=filler_words,
+        filler_count=len(filler_words),
+        cleaned_text=data["cleaned_text"],
+        duration_seconds=wpm_data["duration_seconds"],
+        word_count=wpm_data["word_count"],
+        wpm=wpm_data["wpm"],
+        total_pauses=pause_data["total_pauses"],
+        total_hesitations=pause_data["total_hesitations"],
+        pause_durations=pause_data["pause_durations"],
+        average_pause_duration=pause_data["average_pause_duration"],
+        total_pause_time=pause_data["total_pause_time"],
+        hesitation_words=pause_data["hesitation_words"],
+        fluency_score=fluency_data["fluency_score"],
+        pause_ratio=fluency_data["pause_ratio"],
+        hesitation_rate=fluency_data["hesitation_rate"],
+        confidence_score=confidence_data["confidence_score"],
+        wpm_score=confidence_data["wpm_score"],
+        filler_score=confidence_data["filler_score"],
+        pause_score=confidence_data["pause_score"],
+        hesitation_score=confidence_data["hesitation_score"],
+        overall_rating=confidence_data["overall_rating"],
+        recommendations=confidence_data["recommendations"],
+    )
+
+
+def _cache_response(cache_key: tuple, response: TranscriptionResponse, data: dict) -> None:
+    """Store a response in _response_cache unless a GPT call fell back while building it."""
+    if data["degraded"]:
+        logger.warning("GPT fallback used -> response not cached")
+        return
+    _response_cache.set(cache_key, response)
+
+
+def _sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+
 @router.post("/transcribe", response_model=TranscriptionResponse)
 async def transcribe_audio(
     file: UploadFile = File(...),
@@ -144,7 +474,8 @@ async def transcribe_audio(
     """
     Transcribe audio file to text and analyze speech patterns
     
-    - **file**: Audio file (MP3, WAV, M4A, OGG, FLAC, WebM, etc.)
+    - **file**: Audio file (MP3, WAV, M4A, OGG, FLAC, WebM, etc.), at most MAX_UPLOAD_MB
+      (default 50 MB); larger uploads get 413
     
     Supported formats:
     - MP3 (audio/mpeg)
@@ -183,90 +514,101 @@ async def transcribe_audio(
     logger.info("---------- POST /transcribe ----------")
     logger.info("Request | file=%s level=%s category=%s title=%s", file.filename or "(no name)", level or "-", category or "-", (title[:50] + "..." if title and len(title) > 50 else title) or "-")
     _validate_file_type(file)
-    temp_file_path = None
     try:
-        audio_content = await file.read()
-        temp_file_path = f"/tmp/{file.filename}"
-        with open(temp_file_path, "wb") as f:
-            f.write(audio_content)
-        logger.info("Saved temp file size=%d bytes path=%s", len(audio_content), temp_file_path)
-        data = await _run_pipeline(temp_file_path, level, category, title)
-        text = data["text"]
+        async with _uploaded_temp_file(file) as (temp_file_path, _size, digest):
+            cache_key = (digest, level, category, title)
+            cached = _response_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Response cache hit | digest=%s", digest)
+                return cached
+            data = await _run_pipeline(temp_file_path, level, category, title, digest)
         filler_words = data["filler_words"]
-        cleaned_text = data["cleaned_text"]
         wpm_data = data["wpm_data"]
-        pause_data = data["pause_data"]
-        fluency_data = data["fluency_data"]
-        confidence_data = data["confidence_data"]
-        logger.info("Fillers | count=%d words=%s", len(filler_words), [f.get("word") for f in filler_words[:15]])
+        logger.info("Fillers | count=%d", len(filler_words))
         logger.info("WPM | duration=%.2fs word_count=%d wpm=%.2f", wpm_data["duration_seconds"], wpm_data["word_count"], wpm_data["wpm"])
-        off_topic = False
-        if title and title.strip():
-            is_relevant = await check_answer_relevance_to_title(title.strip(), text)
-            if not is_relevant:
-                off_topic = True
-            logger.info("Relevance check | title=%s relevant=%s off_topic=%s", title[:40], is_relevant, off_topic)
-        if off_topic:
-            improved_text = OFF_TOPIC_MESSAGE
+        if data["off_topic"]:
             logger.info("Off-topic -> improved_text: [fixed message]")
-            confidence_data = {
-                **confidence_data,
-                "confidence_score": round(min(confidence_data["confidence_score"] * 0.5, 40.0), 2),
-                "wpm_score": round(min(confidence_data["wpm_score"] * 0.5, 50.0), 2),
-                "filler_score": round(min(confidence_data["filler_score"] * 0.5, 50.0), 2),
-                "pause_score": round(min(confidence_data["pause_score"] * 0.5, 50.0), 2),
-                "hesitation_score": round(min(confidence_data["hesitation_score"] * 0.5, 50.0), 2),
-                "overall_rating": "Low",
-                "recommendations": [
-                    f"Try to address the challenge topic: \"{title}\". Speak about the question or key points related to it instead of going off-topic.",
-                    "Your response was not related to the given challenge. Next time, stay on topic to get a proper score and feedback.",
-                ],
-            }
-        else:
-            improved_text = await generate_improved_text(cleaned_text, level=level, category=category, title=title)
-            logger.info("Improved text (preview): %s", (improved_text[:200] + "...") if improved_text and len(improved_text) > 200 else (improved_text or ""))
-        if os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
-        logger.info("---------- RESPONSE ---------- | confidence=%.2f rating=%s wpm=%.2f words=%d", confidence_data["confidence_score"], confidence_data["overall_rating"], wpm_data["wpm"], wpm_data["word_count"])
-        return TranscriptionResponse(
-            text=text,
-            improved_text=improved_text,
-            tts_speech=None,
-            level=level,
-            category=category,
-            title=title,
-            filler_words=filler_words,
-            filler_count=len(filler_words),
-            cleaned_text=cleaned_text,
-            duration_seconds=wpm_data["duration_seconds"],
-            word_count=wpm_data["word_count"],
-            wpm=wpm_data["wpm"],
-            total_pauses=pause_data["total_pauses"],
-            total_hesitations=pause_data["total_hesitations"],
-            pause_durations=pause_data["pause_durations"],
-            average_pause_duration=pause_data["average_pause_duration"],
-            total_pause_time=pause_data["total_pause_time"],
-            hesitation_words=pause_data["hesitation_words"],
-            fluency_score=fluency_data["fluency_score"],
-            pause_ratio=fluency_data["pause_ratio"],
-            hesitation_rate=fluency_data["hesitation_rate"],
-            confidence_score=confidence_data["confidence_score"],
-            wpm_score=confidence_data["wpm_score"],
-            filler_score=confidence_data["filler_score"],
-            pause_score=confidence_data["pause_score"],
-            hesitation_score=confidence_data["hesitation_score"],
-            overall_rating=confidence_data["overall_rating"],
-            recommendations=confidence_data["recommendations"],
-        )
+        if logger.isEnabledFor(logging.DEBUG):
+            # Transcript-sized strings: only built when debug logging is on
+            improved_text = data["improved_text"] or ""
+            logger.debug("Fillers | words=%s", [f.get("word") for f in filler_words[:15]])
+            logger.debug("Improved text (preview): %s", (improved_text[:200] + "...") if len(improved_text) > 200 else improved_text)
+        response = _build_response(data, level, category, title)
+        logger.info("---------- RESPONSE ---------- | confidence=%.2f rating=%s wpm=%.2f words=%d", response.confidence_score, response.overall_rating, response.wpm, response.word_count)
+        _cache_response(cache_key, response, data)
+        return response
     except HTTPException:
         raise
     except Exception as e:
         logger.exception("Transcribe failed: %s", e)
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
         raise HTTPException(status_code=500, detail=f"Error processing audio: {str(e)}")
 
 
+@router.post("/transcribe/stream")
+async def transcribe_audio_stream(
+    file: UploadFile = File(...),
+    level: str | None = Form(None),
+    category: str | None = Form(None),
+    title: str | None = Form(None),
+):
+    """
+    Same analysis as /transcribe, streamed as Server-Sent Events (text/event-stream)
+    so the client can render partial results while the GPT calls finish.
+
+    Events, in order:
+    - **transcription**: `{text, duration_seconds}` as soon as Whisper returns
+    - **filler_words**: `{filler_words, filler_count, cleaned_text}`
+    - **analysis**: WPM, pause and fluency fields
+    - **scores**: confidence/component scores, overall_rating and off_topic (before any GPT wait)
+    - **improved_text**: `{improved_text}` (recommendations may still be running)
+    - **result**: the full TranscriptionResponse (same body as /transcribe)
+
+    On failure an **error** event `{status_code, detail}` is sent and the stream ends.
+    A cached audio file gets only the **result** event.
+    """
+    logger.info("---------- POST /transcribe/stream ----------")
+    logger.info("Request | file=%s level=%s category=%s title=%s", file.filename or "(no name)", level or "-", category or "-", (title[:50] + "..." if title and len(title) > 50 else title) or "-")
+    _validate_file_type(file)
+    fd, temp_file_path = await asyncio.to_thread(_create_temp_file, file.filename)
+    try:
+        size, digest = await _save_upload(file, fd)
+    except Exception:
+        await asyncio.to_thread(_remove_temp_file, temp_file_path)
+        raise
+    logger.info("Saved temp file size=%d bytes path=%s", size, temp_file_path)
+    cache_key = (digest, level, category, title)
+
+    async def event_stream():
+        try:
+            cached = _response_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Response cache hit | digest=%s", digest)
+                yield _sse_event("result", cached.model_dump())
+                return
+            async for stage, payload in _pipeline_stages(temp_file_path, level, category, title, digest):
+                if stage == "done":
+                    response = _build_response(payload, level, category, title)
+                    _cache_response(cache_key, response, payload)
+                    logger.info("---------- RESPONSE (stream) ---------- | confidence=%.2f rating=%s wpm=%.2f words=%d", response.confidence_score, response.overall_rating, response.wpm, response.word_count)
+                    yield _sse_event("result", response.model_dump())
+                else:
+                    yield _sse_event(stage, payload)
+        except HTTPException as e:
+            yield _sse_event("error", {"status_code": e.status_code, "detail": e.detail})
+        except Exception as e:
+            logger.exception("Transcribe stream failed: %s", e)
+            yield _sse_event("error", {"status_code": 500, "detail": f"Error processing audio: {str(e)}"})
+
+    # The temp file is removed by the response's background task, which also runs when the
+    # client disconnects before the generator starts (a generator finally would never run then)
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(_remove_temp_file, temp_file_path),
+    )
+
+
 @router.post("/free-speech", response_model=TranscriptionResponse)
 async def free_speech(file: UploadFile = File(...)):
     """
@@ -276,60 +618,21 @@ async def free_speech(file: UploadFile = File(...)):
     logger.info("---------- POST /free-speech ----------")
     logger.info("Request | file=%s (no level/category/title)", file.filename or "(no name)")
     _validate_file_type(file)
-    temp_file_path = None
     try:
-        audio_content = await file.read()
-        temp_file_path = f"/tmp/{file.filename}"
-        with open(temp_file_path, "wb") as f:
-            f.write(audio_content)
-        logger.info("Saved temp file size=%d bytes path=%s", len(audio_content), temp_file_path)
-        data = await _run_pipeline(temp_file_path, None, None, None)
-        text = data["text"]
-        filler_words = data["filler_words"]
-        cleaned_text = data["cleaned_text"]
-        wpm_data = data["wpm_data"]
-        pause_data = data["pause_data"]
-        fluency_data = data["fluency_data"]
-        confidence_data = data["confidence_data"]
-        improved_text = await generate_improved_text(cleaned_text, level=None, category=None, title=None)
-        if os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
-        logger.info("---------- RESPONSE (free-speech) ---------- | confidence=%.2f rating=%s wpm=%.2f words=%d", confidence_data["confidence_score"], confidence_data["overall_rating"], wpm_data["wpm"], wpm_data["word_count"])
-        return TranscriptionResponse(
-            text=text,
-            improved_text=improved_text,
-            tts_speech=None,
-            level=None,
-            category=None,
-            title=None,
-            filler_words=filler_words,
-            filler_count=len(filler_words),
-            cleaned_text=cleaned_text,
-            duration_seconds=wpm_data["duration_seconds"],
-            word_count=wpm_data["word_count"],
-            wpm=wpm_data["wpm"],
-            total_pauses=pause_data["total_pauses"],
-            total_hesitations=pause_data["total_hesitations"],
-            pause_durations=pause_data["pause_durations"],
-            average_pause_duration=pause_data["average_pause_duration"],
-            total_pause_time=pause_data["total_pause_time"],
-            hesitation_words=pause_data["hesitation_words"],
-            fluency_score=fluency_data["fluency_score"],
-            pause_ratio=fluency_data["pause_ratio"],
-            hesitation_rate=fluency_data["hesitation_rate"],
-            confidence_score=confidence_data["confidence_score"],
-            wpm_score=confidence_data["wpm_score"],
-            filler_score=confidence_data["filler_score"],
-            pause_score=confidence_data["pause_score"],
-            hesitation_score=confidence_data["hesitation_score"],
-            overall_rating=confidence_data["overall_rating"],
-            recommendations=confidence_data["recommendations"],
-        )
+        async with _uploaded_temp_file(file) as (temp_file_path, _size, digest):
+            cache_key = (digest, None, None, None)
+            cached = _response_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Response cache hit | digest=%s", digest)
+                return cached
+            data = await _run_pipeline(temp_file_path, None, None, None, digest)
+        response = _build_response(data, None, None, None)
+        logger.info("---------- RESPONSE (free-speech) ---------- | confidence=%.2f rating=%s wpm=%.2f words=%d", response.confidence_score, response.overall_rating, response.wpm, response.word_count)
+        _cache_response(cache_key, response, data)
+        return response
     except HTTPException:
         raise
     except Exception as e:
         logger.exception("Free-speech failed: %s", e)
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
         raise HTTPException(status_code=500, detail=f"Error processing audio: {str(e)}")
 
@@ -1,19 +1,54 @@
 """
 AI services for transcription, filler word detection, WPM calculation, pause analysis, and confidence analysis
+Submodules are imported lazily (PEP 562), on first attribute access.
 """
-from .transcription import transcribe_audio_file
-from .filler_detection import detect_filler_words_with_gpt, remove_filler_words
-from .wpm_calculation import calculate_wpm, count_words
-from .pause_analysis import analyze_pauses_and_hesitations, calculate_fluency_score
-from .confidence_analysis import calculate_confidence_score, _generate_recommendations_with_gpt, _generate_recommendations_with_gpt
+import importlib
+
+_LAZY = {
+    "transcribe_audio_file": ".transcription",
+    "detect_filler_words_with_gpt": ".filler_detection",
+    "detect_filler_words_with_gpt_batch": ".filler_detection",
+    "remove_filler_words": ".filler_detection",
+    "calculate_wpm": ".wpm_calculation",
+    "calculate_wpm_batch": ".wpm_calculation",
+    "count_words": ".wpm_calculation",
+    "analyze_pauses_and_hesitations": ".pause_analysis",
+    "calculate_fluency_score": ".pause_analysis",
+    "calculate_fluency_score_batch": ".pause_analysis",
+    "calculate_confidence_score": ".confidence_analysis",
+    "calculate_confidence_metrics": ".confidence_analysis",
+    "calculate_confidence_score_batch": ".confidence_analysis",
+    "calculate_confidence_metrics_batch": ".confidence_analysis",
+    "_generate_recommendations_with_gpt": ".confidence_analysis",
+}
 
 __all__ = [
     "transcribe_audio_file",
     "detect_filler_words_with_gpt",
+    "detect_filler_words_with_gpt_batch",
     "remove_filler_words",
     "calculate_wpm",
+    "calculate_wpm_batch",
     "count_words",
     "analyze_pauses_and_hesitations",
     "calculate_fluency_score",
-    "calculate_confidence_score"
+    "calculate_fluency_score_batch",
+    "calculate_confidence_score",
+    "calculate_confidence_metrics",
+    "calculate_confidence_score_batch",
+    "calculate_confidence_metrics_batch",
 ]
+
+
+def __getattr__(name):
+    try:
+        module_name = _LAZY[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
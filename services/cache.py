@@ -0,0 +1,176 @@
+"""
+Small in-process caches used to skip repeated Whisper/GPT work
+"""
+import asyncio
+import functools
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+# Optional: persist entries across restarts
+try:
+    import diskcache
+    HAS_DISKCACHE = True
+except ImportError:
+    HAS_DISKCACHE = False
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used cache with optional per-entry TTL (seconds).
+    Only touched from the event loop thread, so no locking is needed.
+    maxsize <= 0 disables caching (get always misses, set is a no-op).
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        if self.ttl is not None:
+            expires_at, value = value
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value) if self.ttl is not None else value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        """Size and hit/miss counters (for logging / health)."""
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+class PersistentLRUCache(LRUCache):
+    """
+    LRUCache backed by an on-disk diskcache.Cache so entries survive restarts.
+    Memory is checked first; disk hits are promoted back into memory.
+    Without diskcache installed (or with no directory) it behaves like a plain LRUCache.
+    """
+
+    def __init__(self, maxsize: int = 1024, directory: Optional[str] = None, disk_size_limit: int = 1 << 30):
+        super().__init__(maxsize)
+        self.persistence = None
+        if directory and maxsize > 0:
+            if HAS_DISKCACHE:
+                self.persistence = diskcache.Cache(directory, size_limit=disk_size_limit)
+            else:
+                logger.warning("diskcache not installed; cache at %s is memory-only", directory)
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        value = super().get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.persistence is not None:
+            value = self.persistence.get(key, _MISSING)
+            if value is not _MISSING:
+                self.misses -= 1
+                self.hits += 1
+                super().set(key, value)
+                return value
+        return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        super().set(key, value)
+        if self.persistence is not None:
+            self.persistence.set(key, value)
+
+
+# Fallbacks (degraded results) taken while serving the current request; see track_fallbacks
+_fallbacks: ContextVar[Optional[List[str]]] = ContextVar("fallbacks", default=None)
+
+
+def track_fallbacks() -> List[str]:
+    """
+    Start recording fallbacks in the current context and return the list they are added to.
+    Tasks created afterwards share the list, so a request can tell whether any GPT call it
+    made fell back and keep that response out of long-lived caches.
+    """
+    taken: List[str] = []
+    _fallbacks.set(taken)
+    return taken
+
+
+def note_fallback(what: str) -> None:
+    """Record that `what` returned a fallback instead of a real result (no-op when not tracking)."""
+    taken = _fallbacks.get()
+    if taken is not None:
+        taken.append(what)
+
+
+def text_digest(text: str) -> str:
+    """Short content hash of a string, for cache keys."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+T = TypeVar("T")
+
+
+def cached_async(
+    cache: LRUCache,
+    namespace: Hashable = None,
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """
+    Cache an async function's results in `cache`, keyed by namespace (e.g. the model name,
+    so a model switch never serves old answers), function name and a digest of its
+    arguments (strings / None / numbers). Exceptions are not cached, so the wrapped
+    function should raise on failure rather than return a fallback value.
+    Concurrent calls with the same key share one in-flight call instead of each starting
+    their own; it keeps running if a caller is cancelled, so the others still get it.
+    Cached values are shared between callers and must not be mutated.
+    """
+    def decorator(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        inflight: Dict[Hashable, "asyncio.Task[T]"] = {}
+
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            key = (namespace, fn.__qualname__, text_digest(repr((args, sorted(kwargs.items())))))
+            value = cache.get(key, _MISSING)
+            if value is not _MISSING:
+                logger.debug("Cache hit | %s", fn.__qualname__)
+                return value
+            task = inflight.get(key)
+            if task is None:
+                logger.debug("Cache miss | %s", fn.__qualname__)
+                task = asyncio.ensure_future(fn(*args, **kwargs))
+                inflight[key] = task
+
+                def _done(t: "asyncio.Task[T]") -> None:
+                    inflight.pop(key, None)
+                    if not t.cancelled() and t.exception() is None:
+                        cache.set(key, t.result())
+
+                task.add_done_callback(_done)
+            else:
+                logger.debug("Joining in-flight call | %s", fn.__qualname__)
+            return await asyncio.shield(task)
+        wrapper.cache = cache
+        return wrapper
+    return decorator
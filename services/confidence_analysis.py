@@ -1,10 +1,22 @@
 """
 Confidence analysis service based on speech metrics
 """
-import json
-import re
-from typing import Dict, Any, Optional
-from config import get_openai_client, GPT_MODEL, GPT_TEMPERATURE
+import asyncio
+import logging
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
+import numpy as np
+import openai
+import orjson
+from config import (
+    get_openai_client,
+    max_tokens_kwargs,
+    GPT_MODEL,
+    GPT_TEMPERATURE,
+    RECOMMENDATIONS_CACHE_SIZE,
+    RECOMMENDATIONS_CONCURRENCY,
+    GPT_CACHE_TTL_SEC,
+)
+from services.cache import LRUCache, cached_async, note_fallback
 from scoring_config import (
     WPM_OPTIMAL_MIN,
     WPM_OPTIMAL_MAX,
@@ -24,108 +36,149 @@ from scoring_config import (
     WEIGHT_FLUENCY,
 )
 
+logger = logging.getLogger(__name__)
 
-async def calculate_confidence_score(
+# -----------------------------------------------------------------------------
+# Component score curves. Each curve is written once as a readable scalar function and
+# sampled at import into (xp, fp) tables, so per request a score is one np.interp lookup.
+# Curves are piecewise linear; sampling every breakpoint plus its float neighbours on both
+# sides keeps the step changes (e.g. WPM 70 -> 30 just above the optimal band) exact.
+# -----------------------------------------------------------------------------
+
+def _curve_table(curve: Callable[[float], float], breakpoints: Iterable[float]) -> Tuple[np.ndarray, np.ndarray]:
+    xs = []
+    for b in sorted(set(float(b) for b in breakpoints)):
+        xs.extend((np.nextafter(b, -np.inf), b, np.nextafter(b, np.inf)))
+    return np.asarray(xs), np.asarray([curve(x) for x in xs])
+
+
+_WPM_BAND = max(1, (WPM_OPTIMAL_MAX - WPM_OPTIMAL_MIN) / 2)  # falloff band below/above optimal
+
+
+def _wpm_curve(wpm: float) -> float:
+    """WPM score — configurable optimal band (narrower = stricter)."""
+    w_min, w_max, band = WPM_OPTIMAL_MIN, WPM_OPTIMAL_MAX, _WPM_BAND
+    if w_min <= wpm <= w_max:
+        return 100.0
+    elif w_min - band <= wpm < w_min:
+        return 70.0 + ((wpm - (w_min - band)) / band) * 30
+    elif w_max < wpm <= w_max + band:
+        return 100.0 - ((wpm - w_max) / band) * 30
+    elif wpm < w_min - band:
+        if wpm >= 100 and (w_min - band) > 100:
+            return 50.0 + (wpm - 100) / ((w_min - band) - 100) * 20
+        elif wpm < 100:
+            return max(0, 50.0 - ((100 - wpm) / 40) * 50)
+        else:
+            return 50.0
+    else:
+        return max(0, 30.0 - ((wpm - (w_max + band)) / 30) * 30)
+
+
+def _filler_curve(fillers_per_100: float) -> float:
+    """Filler score — full score only when fillers per 100 words <= config threshold."""
+    t = FILLERS_PER_100_FOR_FULL_SCORE
+    if fillers_per_100 <= t:
+        return 100.0
+    elif fillers_per_100 <= t + 1.5:
+        return 75.0 - ((fillers_per_100 - t) / 1.5) * 25
+    elif fillers_per_100 <= t + 4:
+        return 50.0 - ((fillers_per_100 - t - 1.5) / 2.5) * 25
+    elif fillers_per_100 <= t + 7:
+        return 25.0 - ((fillers_per_100 - t - 4) / 3) * 20
+    else:
+        return max(0, 5.0 - (fillers_per_100 - t - 7) * 0.5)
+
+
+def _pause_curve(pause_ratio: float) -> float:
+    """Pause score — full score only when pause_ratio <= config threshold."""
+    p_full = PAUSE_RATIO_FOR_FULL_SCORE
+    if pause_ratio <= p_full:
+        return 100.0
+    elif pause_ratio <= p_full + 0.05:
+        return 80.0 - ((pause_ratio - p_full) / 0.05) * 30
+    elif pause_ratio <= p_full + 0.13:
+        return 50.0 - ((pause_ratio - p_full - 0.05) / 0.08) * 35
+    elif pause_ratio <= p_full + 0.23:
+        return 15.0 - ((pause_ratio - p_full - 0.13) / 0.10) * 15
+    else:
+        return 0.0
+
+
+def _hesitation_curve(hesitation_rate: float) -> float:
+    """Hesitation score — full score only when hesitations per 100 words <= config threshold."""
+    h_full = HESITATION_RATE_FOR_FULL_SCORE
+    if hesitation_rate <= h_full:
+        return 100.0
+    elif hesitation_rate <= h_full + 1.5:
+        return 80.0 - ((hesitation_rate - h_full) / 1.5) * 30
+    elif hesitation_rate <= h_full + 4.5:
+        return 50.0 - ((hesitation_rate - h_full - 1.5) / 3) * 30
+    elif hesitation_rate <= h_full + 8.5:
+        return 20.0 - ((hesitation_rate - h_full - 4.5) / 4) * 20
+    else:
+        return 0.0
+
+
+_W_LO = WPM_OPTIMAL_MIN - _WPM_BAND
+_W_HI = WPM_OPTIMAL_MAX + _WPM_BAND
+_WPM_XP, _WPM_FP = _curve_table(
+    _wpm_curve, (0, 60, 100, _W_LO, WPM_OPTIMAL_MIN, WPM_OPTIMAL_MAX, _W_HI, _W_HI + 30),
+)
+_t = FILLERS_PER_100_FOR_FULL_SCORE
+_FILLER_XP, _FILLER_FP = _curve_table(_filler_curve, (0, _t, _t + 1.5, _t + 4, _t + 7, _t + 17))
+_p = PAUSE_RATIO_FOR_FULL_SCORE
+_PAUSE_XP, _PAUSE_FP = _curve_table(_pause_curve, (0, _p, _p + 0.05, _p + 0.13, _p + 0.23))
+_h = HESITATION_RATE_FOR_FULL_SCORE
+_HESITATION_XP, _HESITATION_FP = _curve_table(_hesitation_curve, (0, _h, _h + 1.5, _h + 4.5, _h + 8.5))
+del _t, _p, _h
+
+
+def calculate_confidence_metrics(
     wpm: float,
     filler_count: int,
     word_count: int,
-    total_pauses: int,
     total_hesitations: int,
     pause_ratio: float,
     hesitation_rate: float,
     fluency_score: float,
-    # Note: level, category, title are accepted but not forwarded to GPT anymore
-    level: Optional[str] = None,
-    category: Optional[str] = None,
-    title: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
-    Calculate confidence score based on multiple speech metrics
+    Calculate confidence scores from speech metrics (pure CPU, no GPT call)
     
     Args:
         wpm: Words per minute
         filler_count: Number of filler words
         word_count: Total word count
-        total_pauses: Number of pauses
         total_hesitations: Number of hesitation sounds
         pause_ratio: Ratio of pause time to total time
         hesitation_rate: Hesitations per 100 words
         fluency_score: Fluency score (0-100)
         
     Returns:
-        Dictionary with confidence metrics:
+        Dictionary with:
         - confidence_score: Overall confidence score (0-100)
         - wpm_score: WPM component score (0-100)
         - filler_score: Filler words component score (0-100)
         - pause_score: Pause component score (0-100)
         - hesitation_score: Hesitation component score (0-100)
         - overall_rating: Text rating (Very Low, Low, Moderate, Good, Excellent)
-        - recommendations: List of improvement recommendations
     """
-    # 1. WPM Score — configurable optimal band (narrower = stricter)
-    w_min, w_max = WPM_OPTIMAL_MIN, WPM_OPTIMAL_MAX
-    band = max(1, (w_max - w_min) / 2)  # falloff band below/above optimal
-    if w_min <= wpm <= w_max:
-        wpm_score = 100.0
-    elif w_min - band <= wpm < w_min:
-        wpm_score = 70.0 + ((wpm - (w_min - band)) / band) * 30
-    elif w_max < wpm <= w_max + band:
-        wpm_score = 100.0 - ((wpm - w_max) / band) * 30
-    elif wpm < w_min - band:
-        if wpm >= 100 and (w_min - band) > 100:
-            wpm_score = 50.0 + (wpm - 100) / ((w_min - band) - 100) * 20
-        elif wpm < 100:
-            wpm_score = max(0, 50.0 - ((100 - wpm) / 40) * 50)
-        else:
-            wpm_score = 50.0
-    else:
-        wpm_score = max(0, 30.0 - ((wpm - (w_max + band)) / 30) * 30)
+    # 1-4. Component scores: table lookups on the curves defined above
+    wpm_score = float(np.interp(wpm, _WPM_XP, _WPM_FP))
 
-    # 2. Filler Score — full score only when fillers per 100 <= config threshold
     fillers_per_100 = (filler_count / word_count * 100) if word_count > 0 else 0
-    fillers_per_100_value = fillers_per_100
-    t = FILLERS_PER_100_FOR_FULL_SCORE
-    if fillers_per_100 <= t:
-        filler_score = 100.0
-    elif fillers_per_100 <= t + 1.5:
-        filler_score = 75.0 - ((fillers_per_100 - t) / 1.5) * 25
-    elif fillers_per_100 <= t + 4:
-        filler_score = 50.0 - ((fillers_per_100 - t - 1.5) / 2.5) * 25
-    elif fillers_per_100 <= t + 7:
-        filler_score = 25.0 - ((fillers_per_100 - t - 4) / 3) * 20
-    else:
-        filler_score = max(0, 5.0 - (fillers_per_100 - t - 7) * 0.5)
+    filler_score = float(np.interp(fillers_per_100, _FILLER_XP, _FILLER_FP))
 
-    # 3. Pause Score — full score only when pause_ratio <= config threshold
-    p_full = PAUSE_RATIO_FOR_FULL_SCORE
-    if pause_ratio <= p_full:
-        pause_score = 100.0
-    elif pause_ratio <= p_full + 0.05:
-        pause_score = 80.0 - ((pause_ratio - p_full) / 0.05) * 30
-    elif pause_ratio <= p_full + 0.13:
-        pause_score = 50.0 - ((pause_ratio - p_full - 0.05) / 0.08) * 35
-    elif pause_ratio <= p_full + 0.23:
-        pause_score = 15.0 - ((pause_ratio - p_full - 0.13) / 0.10) * 15
-    else:
-        pause_score = 0.0
+    pause_score = float(np.interp(pause_ratio, _PAUSE_XP, _PAUSE_FP))
 
-    # 4. Hesitation Score — use effective rate (regex + filler_count) when config enabled
+    # Hesitation uses effective rate (regex + filler_count) when config enabled
     if USE_FILLER_COUNT_IN_HESITATION and word_count > 0:
         effective_hesitations = total_hesitations + FILLER_WEIGHT_IN_HESITATION * filler_count
         hesitation_rate_used = effective_hesitations / word_count * 100
     else:
         hesitation_rate_used = hesitation_rate
-    h_full = HESITATION_RATE_FOR_FULL_SCORE
-    if hesitation_rate_used <= h_full:
-        hesitation_score = 100.0
-    elif hesitation_rate_used <= h_full + 1.5:
-        hesitation_score = 80.0 - ((hesitation_rate_used - h_full) / 1.5) * 30
-    elif hesitation_rate_used <= h_full + 4.5:
-        hesitation_score = 50.0 - ((hesitation_rate_used - h_full - 1.5) / 3) * 30
-    elif hesitation_rate_used <= h_full + 8.5:
-        hesitation_score = 20.0 - ((hesitation_rate_used - h_full - 4.5) / 4) * 20
-    else:
-        hesitation_score = 0.0
+    hesitation_score = float(np.interp(hesitation_rate_used, _HESITATION_XP, _HESITATION_FP))
 
     # 5. Overall Confidence Score (weighted average from config)
     confidence_score = (
@@ -147,31 +200,192 @@ async def calculate_confidence_score(
         overall_rating = "Low"
     else:
         overall_rating = "Very Low"
-    
+
+    return {
+        "confidence_score": round(confidence_score, 2),
+        "wpm_score": round(wpm_score, 2),
+        "filler_score": round(filler_score, 2),
+        "pause_score": round(pause_score, 2),
+        "hesitation_score": round(hesitation_score, 2),
+        "overall_rating": overall_rating,
+    }
+
+
+_RATING_THRESHOLDS = np.array([RATING_LOW_MIN, RATING_MODERATE_MIN, RATING_GOOD_MIN, RATING_EXCELLENT_MIN], dtype=float)
+_RATING_LABELS = np.array(["Very Low", "Low", "Moderate", "Good", "Excellent"])
+
+
+def calculate_confidence_metrics_batch(
+    wpm: Iterable[float],
+    filler_count: Iterable[int],
+    word_count: Iterable[int],
+    total_hesitations: Iterable[int],
+    pause_ratio: Iterable[float],
+    hesitation_rate: Iterable[float],
+    fluency_score: Iterable[float],
+) -> Dict[str, np.ndarray]:
+    """
+    Vectorized calculate_confidence_metrics for many sessions (bulk dashboards / exports):
+    each argument is a sequence with one value per session; one numpy pass per column.
+
+    Returns:
+        Same keys as calculate_confidence_metrics, each an array with one entry per session
+        (scores unrounded; overall_rating as strings)
+    """
+    wpm = np.asarray(wpm, dtype=float)
+    filler_count = np.asarray(filler_count, dtype=float)
+    word_count = np.asarray(word_count, dtype=float)
+    total_hesitations = np.asarray(total_hesitations, dtype=float)
+    hesitation_rate = np.asarray(hesitation_rate, dtype=float)
+    has_words = word_count > 0
+    safe_word_count = np.where(has_words, word_count, 1.0)
+
+    wpm_score = np.interp(wpm, _WPM_XP, _WPM_FP)
+    fillers_per_100 = np.where(has_words, filler_count / safe_word_count * 100, 0.0)
+    filler_score = np.interp(fillers_per_100, _FILLER_XP, _FILLER_FP)
+    pause_score = np.interp(np.asarray(pause_ratio, dtype=float), _PAUSE_XP, _PAUSE_FP)
+    if USE_FILLER_COUNT_IN_HESITATION:
+        effective_rate = (total_hesitations + FILLER_WEIGHT_IN_HESITATION * filler_count) / safe_word_count * 100
+        hesitation_rate = np.where(has_words, effective_rate, hesitation_rate)
+    hesitation_score = np.interp(hesitation_rate, _HESITATION_XP, _HESITATION_FP)
+
+    confidence_score = (
+        wpm_score * WEIGHT_WPM +
+        filler_score * WEIGHT_FILLER +
+        pause_score * WEIGHT_PAUSE +
+        hesitation_score * WEIGHT_HESITATION +
+        np.asarray(fluency_score, dtype=float) * WEIGHT_FLUENCY
+    )
+    # Number of rating thresholds the score reaches -> label (same bands as the scalar version)
+    overall_rating = _RATING_LABELS[np.searchsorted(_RATING_THRESHOLDS, confidence_score, side="right")]
+
+    return {
+        "confidence_score": confidence_score,
+        "wpm_score": wpm_score,
+        "filler_score": filler_score,
+        "pause_score": pause_score,
+        "hesitation_score": hesitation_score,
+        "overall_rating": overall_rating,
+    }
+
+
+# Excellent ratings: the GPT prompt only asks for 1-2 positive reinforcement messages there,
+# so they are picked locally from the strongest component instead of a round trip.
+_EXCELLENT_RECOMMENDATIONS = {
+    "wpm_score": "Your speaking pace is spot on: clear, steady and easy to follow. Keep it up!",
+    "filler_score": "You spoke almost entirely without filler words, which makes you sound confident and prepared.",
+    "pause_score": "Your pauses are well placed and brief, so your speech flows naturally.",
+    "hesitation_score": "You delivered your ideas without hesitating, which sounds assured and convincing.",
+}
+_EXCELLENT_CLOSING = "Excellent work overall! Keep practicing with new topics to stay this sharp."
+
+
+def _static_excellent_recommendations(metrics: Dict[str, Any]) -> list:
+    """Reinforcement messages for an Excellent rating, led by the highest component score."""
+    best = max(_EXCELLENT_RECOMMENDATIONS, key=lambda k: metrics[k])
+    return [_EXCELLENT_RECOMMENDATIONS[best], _EXCELLENT_CLOSING]
+
+
+async def calculate_confidence_score(
+    wpm: float,
+    filler_count: int,
+    word_count: int,
+    total_pauses: int,
+    total_hesitations: int,
+    pause_ratio: float,
+    hesitation_rate: float,
+    fluency_score: float,
+    # Note: level, category, title are accepted but not forwarded to GPT anymore
+    level: Optional[str] = None,
+    category: Optional[str] = None,
+    title: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Calculate confidence score (calculate_confidence_metrics) and add GPT recommendations
+    (fixed reinforcement messages for an Excellent rating, no GPT call).
+    Async only because of the recommendations call; use calculate_confidence_metrics
+    when just the scores are needed.
+        
+    Returns:
+        calculate_confidence_metrics fields plus:
+        - recommendations: List of improvement recommendations
+    """
+    metrics = calculate_confidence_metrics(
+        wpm=wpm,
+        filler_count=filler_count,
+        word_count=word_count,
+        total_hesitations=total_hesitations,
+        pause_ratio=pause_ratio,
+        hesitation_rate=hesitation_rate,
+        fluency_score=fluency_score,
+    )
+    if metrics["overall_rating"] == "Excellent":
+        return {**metrics, "recommendations": _static_excellent_recommendations(metrics)}
+    fillers_per_100 = (filler_count / word_count * 100) if word_count > 0 else 0
+
     # Generate recommendations using GPT
     recommendations = await _generate_recommendations_with_gpt(
         wpm=wpm,
-        wpm_score=wpm_score,
+        wpm_score=metrics["wpm_score"],
         filler_count=filler_count,
-        fillers_per_100=fillers_per_100_value,
+        fillers_per_100=fillers_per_100,
         pause_ratio=pause_ratio,
         hesitation_rate=hesitation_rate,
         total_pauses=total_pauses,
         total_hesitations=total_hesitations,
-        confidence_score=confidence_score,
-        overall_rating=overall_rating,
+        confidence_score=metrics["confidence_score"],
+        overall_rating=metrics["overall_rating"],
         # level/category/title intentionally omitted; they are not used for scoring
     )
     
-    return {
-        "confidence_score": round(confidence_score, 2),
-        "wpm_score": round(wpm_score, 2),
-        "filler_score": round(filler_score, 2),
-        "pause_score": round(pause_score, 2),
-        "hesitation_score": round(hesitation_score, 2),
-        "overall_rating": overall_rating,
-        "recommendations": recommendations
-    }
+    return {**metrics, "recommendations": recommendations}
+
+
+_FALLBACK_RECOMMENDATION = "Keep practicing to improve your speech confidence!"
+
+_RECOMMENDATIONS_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": (
+        "You are an expert speech coach. From the speaker's metrics, give 2-4 specific, actionable "
+        "recommendations to improve their speech confidence and fluency: personalized to the numbers, "
+        "most impactful areas first, with concrete techniques, in an encouraging, friendly tone."
+    ),
+}
+
+# Structured output: the API guarantees {"recommendations": [str, ...]} and nothing else
+_RECOMMENDATIONS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "recommendations",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "recommendations": {"type": "array", "items": {"type": "string"}},
+            },
+            "required": ["recommendations"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+# Caps recommendations calls in flight so a burst of finished sessions queues here
+# instead of turning into 429s (and fallback messages)
+_recommendations_semaphore = asyncio.Semaphore(RECOMMENDATIONS_CONCURRENCY)
+
+# GPT recommendations keyed by coarse metric buckets: near-identical performances share advice
+recommendations_cache = LRUCache(maxsize=RECOMMENDATIONS_CACHE_SIZE, ttl=GPT_CACHE_TTL_SEC)
+
+
+def _recommendations_key(wpm: float, fillers_per_100: float, pause_ratio: float, hesitation_rate: float, overall_rating: str) -> tuple:
+    """Bucket the metrics: WPM to 10, fillers/hesitations per 100 words to 1, pause ratio to 0.05."""
+    return (
+        round(wpm / 10) * 10,
+        round(fillers_per_100),
+        round(pause_ratio * 20) / 20,
+        round(hesitation_rate),
+        overall_rating,
+    )
 
 
 async def _generate_recommendations_with_gpt(
@@ -188,86 +402,150 @@ async def _generate_recommendations_with_gpt(
 ) -> list:
     """
     Generate personalized recommendations using GPT based on speech metrics
+    Results are shared between requests whose metrics fall in the same buckets (_recommendations_key),
+    so GPT only ever sees the bucketed values: the advice it quotes holds for everyone it is served to.
+    The other arguments (exact counts and scores) are not sent.
     """
-    # Do not send level/category/title to GPT; recommendations should be based solely on metrics
-    challenge_context = ""  # no additional context
-
-    prompt = f"""You are an expert speech coach analyzing a person's speaking performance. Based on the following metrics, provide personalized, actionable recommendations to improve their speech confidence and fluency.{challenge_context}
-
-Speech Metrics:
-- Words Per Minute (WPM): {wpm:.2f} (Score: {wpm_score:.2f}/100)
-- Filler Words: {filler_count} total ({fillers_per_100:.2f} per 100 words)
-- Pauses: {total_pauses} pauses ({pause_ratio*100:.1f}% of speaking time)
-- Hesitations: {total_hesitations} hesitation sounds ({hesitation_rate:.2f} per 100 words)
-- Overall Confidence Score: {confidence_score:.2f}/100
-- Overall Rating: {overall_rating}
-
-Provide 2-4 specific, actionable recommendations that:
-1. Are personalized based on the actual metrics
-2. Are encouraging and constructive
-3. Focus on the areas that need the most improvement
-4. Provide concrete steps or techniques
-5. Are written in a friendly, supportive tone
-
-Return your response as a JSON object with this exact format:
-{{
-  "recommendations": [
-    "First recommendation here",
-    "Second recommendation here",
-    "Third recommendation here"
-  ]
-}}
-
-If the performance is excellent (confidence score >= 90), provide 1-2 positive reinforcement messages.
-If there are multiple areas to improve, prioritize the most impactful ones.
-
-Recommendations:"""
-
+    key = _recommendations_key(wpm, fillers_per_100, pause_ratio, hesitation_rate, overall_rating)
     try:
-        client = get_openai_client()
-        response = client.chat.completions.create(
-            model=GPT_MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert speech coach. Provide personalized, actionable recommendations for improving speech confidence. Always return valid JSON only, no additional text."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=GPT_TEMPERATURE,
-            response_format={"type": "json_object"}
-        )
-        
-        # Parse the response
-        response_content = response.choices[0].message.content.strip()
-        
-        try:
-            parsed = json.loads(response_content)
-            if isinstance(parsed, dict) and "recommendations" in parsed:
-                recommendations = parsed["recommendations"]
-                if isinstance(recommendations, list):
-                    # Validate and clean recommendations
-                    cleaned_recommendations = []
-                    for rec in recommendations:
-                        if isinstance(rec, str) and len(rec.strip()) > 0:
-                            cleaned_recommendations.append(rec.strip())
-                    return cleaned_recommendations if cleaned_recommendations else ["Keep practicing to improve your speech confidence!"]
-        except json.JSONDecodeError:
-            # Fallback: try to extract recommendations from text
-            json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response_content, re.DOTALL)
-            if json_match:
-                parsed = json.loads(json_match.group(1))
-                if "recommendations" in parsed:
-                    return parsed["recommendations"]
-        
-        # Last resort fallback
-        return ["Keep practicing to improve your speech confidence!"]
-    
-    except Exception as e:
-        print(f"Error in GPT recommendations generation: {str(e)}")
+        return list(await _request_recommendations(key))
+    except (openai.APIError, ValueError):
+        # APIError is raised once the SDK's own retries (OPENAI_MAX_RETRIES) are exhausted
+        logger.exception("GPT recommendations generation failed")
+        note_fallback("recommendations")
         # Fallback to basic recommendation
-        return ["Keep practicing to improve your speech confidence!"]
+        return [_FALLBACK_RECOMMENDATION]
 
+
+def _recommendations_request(key: tuple) -> Dict[str, Any]:
+    """
+    Chat completions request body for recommendations (shared by the live and Batch API paths),
+    built only from the _recommendations_key buckets.
+    """
+    wpm, fillers_per_100, pause_ratio, hesitation_rate, overall_rating = key
+    # Do not send level/category/title to GPT; recommendations should be based solely on metrics.
+    # Instructions live in the fixed system message (cacheable prefix); the output shape is
+    # enforced by the json_schema response format, so the prompt carries no JSON example.
+    prompt = f"""Speech metrics (rounded):
+- Words Per Minute (WPM): about {wpm}
+- Filler Words: about {fillers_per_100} per 100 words
+- Pauses: about {pause_ratio*100:.0f}% of speaking time
+- Hesitations: about {hesitation_rate} hesitation sounds per 100 words
+- Overall Rating: {overall_rating}"""
+
+    return {
+        "model": GPT_MODEL,
+        "messages": [
+            _RECOMMENDATIONS_SYSTEM_MESSAGE,
+            {"role": "user", "content": prompt},
+        ],
+        "temperature": GPT_TEMPERATURE,
+        "response_format": _RECOMMENDATIONS_RESPONSE_FORMAT,
+        # 2-4 short tips fit in well under 300 tokens; the cap bounds worst-case latency and cost
+        **max_tokens_kwargs(400),
+    }
+
+
+def _parse_recommendations(response_content: str) -> list:
+    """Recommendations list from the model's schema-conforming JSON; raises ValueError if empty/unusable."""
+    try:
+        recommendations = orjson.loads(response_content)["recommendations"]
+    except (orjson.JSONDecodeError, KeyError, TypeError) as e:
+        raise ValueError("Unusable recommendations response") from e
+    # Strip each tip once; drop blank (and, defensively, non-string) ones
+    cleaned_recommendations = [s for s in (rec.strip() for rec in recommendations if isinstance(rec, str)) if s]
+    if not cleaned_recommendations:
+        raise ValueError("Empty recommendations response")
+    return cleaned_recommendations
+
+
+@cached_async(recommendations_cache, namespace=GPT_MODEL)
+async def _request_recommendations(key: tuple) -> tuple:
+    """
+    GPT recommendations call for this _recommendations_key bucket (cached; concurrent requests in
+    one bucket share a call; raises openai.APIError / ValueError on failure)
+    """
+    client = get_openai_client()
+    async with _recommendations_semaphore:
+        response = await client.chat.completions.create(**_recommendations_request(key))
+    return tuple(_parse_recommendations(response.choices[0].message.content))
+
+
+_BATCH_DONE_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+async def calculate_confidence_score_batch(
+    items: List[Dict[str, Any]],
+    poll_interval: float = 30.0,
+) -> List[Dict[str, Any]]:
+    """
+    calculate_confidence_score for many sessions at once (bulk re-scoring, teacher grading),
+    with the GPT recommendations sent through the OpenAI Batch API: half the price of live
+    calls, completed server-side within 24h. Not for the request path — this waits (polling
+    every poll_interval seconds) until the batch finishes.
+
+    Args:
+        items: dicts of calculate_confidence_score keyword arguments
+
+    Returns:
+        One result per item, in order (same shape as calculate_confidence_score). Items the
+        batch did not answer get the fallback recommendation.
+    """
+    results: List[Dict[str, Any]] = []
+    lines = []
+    if not items:
+        return results
+    columns = calculate_confidence_metrics_batch(**{
+        key: [item[key] for item in items]
+        for key in ("wpm", "filler_count", "word_count", "total_hesitations", "pause_ratio", "hesitation_rate", "fluency_score")
+    })
+    for idx, item in enumerate(items):
+        metrics = {
+            key: str(values[idx]) if key == "overall_rating" else round(float(values[idx]), 2)
+            for key, values in columns.items()
+        }
+        if metrics["overall_rating"] == "Excellent":
+            results.append({**metrics, "recommendations": _static_excellent_recommendations(metrics)})
+            continue
+        results.append({**metrics, "recommendations": [_FALLBACK_RECOMMENDATION]})
+        word_count = item["word_count"]
+        body = _recommendations_request(_recommendations_key(
+            wpm=item["wpm"],
+            fillers_per_100=(item["filler_count"] / word_count * 100) if word_count > 0 else 0,
+            pause_ratio=item["pause_ratio"],
+            hesitation_rate=item["hesitation_rate"],
+            overall_rating=metrics["overall_rating"],
+        ))
+        lines.append(orjson.dumps({"custom_id": str(idx), "method": "POST", "url": "/v1/chat/completions", "body": body}))
+    if not lines:
+        return results
+
+    # Batch endpoints via the client's generic HTTP methods (works on openai SDKs without client.batches)
+    client = get_openai_client()
+    input_file = await client.files.create(
+        file=("recommendations.jsonl", b"\n".join(lines)),
+        purpose="batch",
+    )
+    batch = orjson.loads(await client.post(
+        "/batches",
+        body={"input_file_id": input_file.id, "endpoint": "/v1/chat/completions", "completion_window": "24h"},
+        cast_to=str,
+    ))
+    while batch["status"] not in _BATCH_DONE_STATUSES:
+        await asyncio.sleep(poll_interval)
+        batch = orjson.loads(await client.get(f"/batches/{batch['id']}", cast_to=str))
+    if batch["status"] != "completed" or not batch.get("output_file_id"):
+        logger.error("Recommendations batch %s ended with status %s", batch["id"], batch["status"])
+        return results
+
+    output = await client.files.content(batch["output_file_id"])
+    for line in output.text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+            content = record["response"]["body"]["choices"][0]["message"]["content"]
+            results[int(record["custom_id"])]["recommendations"] = _parse_recommendations(content)
+        except Exception:
+            logger.exception("Could not read batch recommendation line")
+    return results
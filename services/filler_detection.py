@@ -1,41 +1,137 @@
 """
 Filler word detection service using GPT
 """
+import asyncio
+import bisect
+import heapq
+import itertools
+import logging
+import operator
 import re
-import json
 from typing import List, Dict, Any, Optional, Tuple
+import orjson
 from config import (
     get_openai_client,
+    max_tokens_kwargs,
     GPT_MODEL,
-    GPT_TEMPERATURE
+    GPT_TEMPERATURE,
+    GPT_CACHE_SIZE,
+    GPT_CACHE_TTL_SEC,
+    FILLER_SKIP_MAX_WORDS,
 )
+from services.cache import LRUCache, cached_async, note_fallback
 
+logger = logging.getLogger(__name__)
 
-# Cache which param name the OpenAI client accepts (old client = max_tokens, new = max_completion_tokens)
-_max_tokens_param: Optional[str] = None
-
-
-def _max_tokens_kwargs(n: int) -> dict:
-    """Return kwargs for token limit: works with both old (max_tokens) and new (max_completion_tokens) OpenAI client."""
-    global _max_tokens_param
-    if _max_tokens_param is not None:
-        return {_max_tokens_param: n}
-    import inspect
-    client = get_openai_client()
-    sig = inspect.signature(client.chat.completions.create)
-    if "max_completion_tokens" in sig.parameters:
-        _max_tokens_param = "max_completion_tokens"
-    else:
-        _max_tokens_param = "max_tokens"
-    return {_max_tokens_param: n}
+# GPT results (fillers, improved text, relevance) by model + text digest + params: a retried or
+# re-submitted transcript skips the OpenAI round trip. Failures are never cached.
+gpt_result_cache = LRUCache(maxsize=GPT_CACHE_SIZE, ttl=GPT_CACHE_TTL_SEC)
 
 
 # Regex pattern to catch hesitation sounds — comprehensive list with multiple variations
 HESITATION_REGEX = re.compile(
-    r"\b(um+|uh+|u+h+|uh-huh|er+|erm+|ah+|ahhh+|hmm+|mm-hmm|mhm+|eh+|eh+m+|mm+|uh-huh|um-um|uh-uh)\b",
+    r"\b(?:um+|uh+|u+h+|uh-huh|er+|erm+|ah+|ahhh+|hmm+|mm-hmm|mhm+|eh+|eh+m+|mm+|uh-huh|um-um|uh-uh)\b",
     re.IGNORECASE,
 )
 
+# Optional: Aho-Corasick automaton over the literal spellings HESITATION_REGEX matches, one
+# linear pass instead of trying the alternation at every word (pip install pyahocorasick)
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+# Longest letter run the automaton knows (the regex's "+" is unbounded; longer runs such as
+# "ummmmmmmmmmmmmmmmmmmmm" are not matched on this path)
+_HESITATION_MAX_REPEAT = 20
+
+
+def _hesitation_forms(max_repeat: int) -> set:
+    """
+    Lowercase spellings matched by HESITATION_REGEX, with letter runs up to max_repeat.
+    Keep in sync with the regex. The hyphenated forms other than mm-hmm are left out:
+    the regex matches "uh" / "um" first there and never reaches them.
+    """
+    forms = {"mm-hmm"}
+    for n in range(1, max_repeat + 1):
+        forms |= {"u" + "m" * n, "e" + "r" * n, "er" + "m" * n, "a" + "h" * n, "h" + "m" * (n + 1),
+                  "mh" + "m" * n, "m" * (n + 1)}
+        for k in range(1, max_repeat + 1):
+            forms |= {"u" * n + "h" * k, "e" + "h" * n + "m" * k}
+        forms.add("e" + "h" * n)
+    return forms
+
+
+if HAS_AHOCORASICK:
+    _HESITATION_AUTOMATON = ahocorasick.Automaton()
+    for _form in _hesitation_forms(_HESITATION_MAX_REPEAT):
+        _HESITATION_AUTOMATON.add_word(_form, len(_form))
+    _HESITATION_AUTOMATON.make_automaton()
+
+
+def _is_word_char(ch: str) -> bool:
+    # Same definition as the regex's \b
+    return ch.isalnum() or ch == "_"
+
+
+def _hesitation_spans(text: str) -> List[Tuple[int, int, str]]:
+    """
+    HESITATION_REGEX matches as (position, length, word), in order. Uses the Aho-Corasick
+    automaton when pyahocorasick is installed, otherwise the regex.
+    """
+    lowered = text.lower()
+    if not HAS_AHOCORASICK or len(lowered) != len(text):  # lower() changed offsets: use the regex
+        return [(m.start(), m.end() - m.start(), m.group(0)) for m in HESITATION_REGEX.finditer(text)]
+    n = len(lowered)
+    candidates = []
+    for end, length in _HESITATION_AUTOMATON.iter(lowered):
+        start = end - length + 1
+        # Whole words only (\b on both sides)
+        if (start == 0 or not _is_word_char(lowered[start - 1])) and (end + 1 == n or not _is_word_char(lowered[end + 1])):
+            candidates.append((start, length))
+    # Like the regex scan: leftmost first, the longer form on a shared start ("mm-hmm" over "mm"),
+    # nothing inside a match already taken
+    candidates.sort(key=lambda c: (c[0], -c[1]))
+    spans = []
+    last_end = -1
+    for start, length in candidates:
+        if start >= last_end:
+            spans.append((start, length, text[start:start + length]))
+            last_end = start + length
+    return spans
+
+# Words that can be fillers (tier 2 of the prompt, plus hesitation spellings the regex misses).
+# A short answer with none of these, no regex hesitation and no stutter skips the GPT call.
+_FILLER_CANDIDATE_WORDS = frozenset({
+    "like", "know", "mean", "actually", "basically", "literally", "well", "sort", "kind",
+    "right", "yeah", "okay", "ok", "just", "so", "anyway", "see", "think", "guess", "sure",
+    "ur", "hm", "huh", "em", "err", "euh", "ew",
+})
+_WORD_RE = re.compile(r"[a-z']+")
+
+# Relevance precheck: title words too common to show the answer is on topic
+_TITLE_STOPWORDS = frozenset({
+    "the", "and", "for", "with", "about", "your", "you", "our", "what", "how", "why", "who",
+    "when", "where", "which", "are", "was", "were", "does", "did", "this", "that", "from",
+    "into", "describe", "tell", "talk", "explain",
+})
+
+# Cleanup patterns applied by remove_filler_words after fillers are cut out
+_WHITESPACE_RE = re.compile(r'\s+')
+_SPACE_BEFORE_PUNCT_RE = re.compile(r'\s+([,.;:!?])')
+
+# Surrounding quotes GPT sometimes wraps around the improved text
+_SURROUNDING_QUOTES_RE = re.compile(r'^"|"$')
+
+# System messages, built once and shared by every call (the SDK does not mutate them).
+# The filler and improved-text ones carry their full instructions and sit next to their prompts.
+_RELEVANCE_SYSTEM_MESSAGE = {"role": "system", "content": "You answer only YES or NO. When in doubt, answer YES. No explanation."}
+_COMBINED_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a forensic speech analyzer and professional speech editor. Find every filler with exact character positions, include word_count, rewrite the speech, and judge topic relevance. Return only valid JSON, no extra text.",
+}
+
 # Filler word detection prompt for GPT — MAXIMUM sensitivity to hesitation sounds
 FILLER_WORD_DETECTION_PROMPT = """ABSOLUTE MISSION: Identify EVERY SINGLE filler word and hesitation with ZERO TOLERANCE for misses.
 
@@ -98,10 +194,131 @@ If NO fillers found:
 }
 
 ALWAYS include "word_count" as an integer. ALWAYS use valid JSON.
+"""
 
+# Header in front of the transcript (user message, or after the prompt in combined analysis)
+TEXT_TO_ANALYZE_HEADER = """
 ==== TEXT TO ANALYZE ====
 """
 
+# Instructions go in the system message so every filler request starts with the same static
+# prefix (eligible for OpenAI prompt caching); the user message is only the transcript
+_FILLER_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are the only source of filler detection and word count. You MUST find every filler with exact character positions and include word_count (total words in the text, split by whitespace). Return only valid JSON with word_count and fillers, no extra text.\n\n"
+    + FILLER_WORD_DETECTION_PROMPT,
+}
+
+
+def _parse_filler_payload(parsed: Any, text: str) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Validate GPT's decoded filler JSON ({"word_count", "fillers"}) against the text:
+    drop fillers whose position doesn't match, add regex hesitations GPT missed, remove overlaps.
+    Returns (fillers, word_count).
+    """
+    word_count_from_gpt: Optional[int] = None
+    if isinstance(parsed, dict):
+        word_count_from_gpt = parsed.get("word_count")
+        if word_count_from_gpt is not None:
+            try:
+                word_count_from_gpt = int(word_count_from_gpt)
+            except (TypeError, ValueError):
+                word_count_from_gpt = None
+    # Handle both direct array and wrapped object
+    if isinstance(parsed, list):
+        filler_words = parsed
+    elif isinstance(parsed, dict) and "fillers" in parsed:
+        filler_words = parsed["fillers"]
+    elif isinstance(parsed, dict) and "filler_words" in parsed:
+        filler_words = parsed["filler_words"]
+    else:
+        filler_words = []
+        if isinstance(parsed, dict):
+            for key, value in parsed.items():
+                if key != "word_count" and isinstance(value, list):
+                    filler_words = value
+                    break
+    
+    # Validate and clean the results; fillers are (position, length, word) tuples until the return
+    validated_fillers = []
+    for filler in filler_words:
+        if isinstance(filler, dict) and "word" in filler and "position" in filler:
+            word = filler["word"]
+            position = int(filler["position"])
+            length = filler.get("length", len(word))
+            
+            # Verify the position is valid
+            if 0 <= position < len(text):
+                # Verify the word actually exists at that position
+                actual_word = text[position:position+length].strip()
+                if word.lower() in actual_word.lower() or actual_word.lower() in word.lower():
+                    validated_fillers.append((position, length, word))
+
+    # Strengthen: add regex-detected hesitation sounds (um/uh/er/erm/ah/hmm) that GPT may have missed
+    regex_fillers = _hesitation_spans(text)
+    if not validated_fillers:
+        # finditer matches are already sorted and never overlap
+        return (_filler_dicts(regex_fillers), _word_count_or_local(word_count_from_gpt, text))
+
+    # Sort by position only (stable: equal positions keep GPT's order)
+    validated_fillers.sort(key=_POSITION)
+    if regex_fillers:
+        # Keep regex hits that overlap no GPT filler: the GPT fillers starting before the hit
+        # ends are a prefix of the sorted list, so compare with that prefix's furthest end
+        starts = [position for position, _, _ in validated_fillers]
+        max_ends = list(itertools.accumulate((position + length for position, length, _ in validated_fillers), max))
+        missed = []
+        for hit in regex_fillers:
+            position, length, _ = hit
+            i = bisect.bisect_left(starts, position + length)
+            if i == 0 or max_ends[i - 1] <= position:
+                missed.append(hit)
+        # Both lists are sorted; on equal positions the GPT filler comes first
+        validated_fillers = list(heapq.merge(validated_fillers, missed, key=_POSITION))
+
+    # Remove overlaps (keep first occurrence when overlapping)
+    non_overlapping = []
+    last_end = -1
+    for filler in validated_fillers:
+        position, length, _ = filler
+        if position >= last_end:
+            non_overlapping.append(filler)
+            last_end = position + length
+
+    return (_filler_dicts(non_overlapping), _word_count_or_local(word_count_from_gpt, text))
+
+
+_POSITION = operator.itemgetter(0)
+
+
+def _filler_dicts(fillers: List[Tuple[int, int, str]]) -> List[Dict[str, Any]]:
+    """(position, length, word) tuples -> the filler dicts returned to callers."""
+    return [{"word": word, "position": position, "length": length} for position, length, word in fillers]
+
+
+def _word_count_or_local(word_count_from_gpt: Optional[int], text: str) -> int:
+    """GPT's word_count if valid, otherwise the local count."""
+    if word_count_from_gpt is not None and word_count_from_gpt >= 0:
+        return word_count_from_gpt
+    from services.wpm_calculation import count_words
+    return count_words(text)
+
+
+def _may_contain_fillers(text: str) -> bool:
+    """
+    False only for short texts (< FILLER_SKIP_MAX_WORDS words) with no hesitation sound,
+    no repeated word and no word from _FILLER_CANDIDATE_WORDS: GPT would find nothing there.
+    """
+    if not text:
+        return False
+    words = _WORD_RE.findall(text.lower())
+    if len(words) >= FILLER_SKIP_MAX_WORDS or HESITATION_REGEX.search(text):
+        return True
+    if not _FILLER_CANDIDATE_WORDS.isdisjoint(words):
+        return True
+    # Stutters ("I I think") are tier-3 fillers
+    return any(a == b for a, b in zip(words, words[1:]))
+
 
 async def detect_filler_words_with_gpt(text: str) -> Tuple[List[Dict[str, Any]], int]:
     """
@@ -111,125 +328,111 @@ async def detect_filler_words_with_gpt(text: str) -> Tuple[List[Dict[str, Any]],
     Returns:
         (list of filler words with positions/lengths, word_count from GPT)
     """
+    if not _may_contain_fillers(text):
+        from services.wpm_calculation import count_words
+        return ([], count_words(text))
+    try:
+        return await _detect_filler_words_cached(text)
+    except orjson.JSONDecodeError:
+        # json_object mode makes this rare; don't salvage fragments of an unparseable answer,
+        # fall back to the regex hesitations only (the fillers that must never be missed)
+        logger.warning("GPT filler response was not valid JSON; using regex-detected hesitations only")
+        note_fallback("filler_detection")
+        return _parse_filler_payload(None, text)
+    except Exception as e:
+        print(f"Error in GPT filler word detection: {str(e)}")
+        note_fallback("filler_detection")
+        from services.wpm_calculation import count_words
+        return ([], count_words(text) if text else 0)
+
+
+@cached_async(gpt_result_cache, namespace=GPT_MODEL)
+async def _detect_filler_words_cached(text: str) -> Tuple[List[Dict[str, Any]], int]:
+    """GPT filler detection call (cached; raises on failure, including a non-JSON answer)."""
+    client = get_openai_client()
+    response = await client.chat.completions.create(
+        model=GPT_MODEL,
+        messages=[
+            _FILLER_SYSTEM_MESSAGE,
+            {"role": "user", "content": TEXT_TO_ANALYZE_HEADER.lstrip() + text},
+        ],
+        temperature=GPT_TEMPERATURE,
+        response_format={"type": "json_object"}
+    )
+    
+    return _parse_filler_payload(orjson.loads(response.choices[0].message.content.strip()), text)
+
+
+# Extra instructions for detect_filler_words_with_gpt_batch: several texts, one JSON object back
+BATCH_FILLER_PROMPT = """
+
+==== BATCH MODE ====
+The TEXT TO ANALYZE is a JSON object {"items": [{"id": ..., "text": ...}, ...]}.
+Apply every rule above to each item's "text" on its own: positions are 0-based indexes into
+that item's text string, and word_count counts that item's words.
+
+Return exactly one JSON object:
+{"results": [{"id": 0, "word_count": 12, "fillers": [{"word": "um", "position": 0, "length": 2}]}, ...]}
+with one entry per input item, using the same id.
+"""
+
+
+async def _detect_filler_words_group(texts: List[str]) -> List[Optional[Tuple[List[Dict[str, Any]], int]]]:
+    """
+    One GPT call for a group of texts. Returns one (fillers, word_count) per text, or None
+    for texts the answer did not cover (or all None if the call fails).
+    """
     try:
-        # Create prompt with the text
-        prompt = FILLER_WORD_DETECTION_PROMPT + text
-        
-        # Call GPT-4o for better accuracy
         client = get_openai_client()
-        response = client.chat.completions.create(
+        items = orjson.dumps({"items": [{"id": i, "text": t} for i, t in enumerate(texts)]}).decode()
+        response = await client.chat.completions.create(
             model=GPT_MODEL,
             messages=[
-                {
-                    "role": "system",
-                    "content": "You are the only source of filler detection and word count. You MUST find every filler with exact character positions and include word_count (total words in the text, split by whitespace). Return only valid JSON with word_count and fillers, no extra text."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
+                _FILLER_SYSTEM_MESSAGE,
+                {"role": "user", "content": TEXT_TO_ANALYZE_HEADER.lstrip() + items + BATCH_FILLER_PROMPT},
             ],
             temperature=GPT_TEMPERATURE,
-            response_format={"type": "json_object"}
+            response_format={"type": "json_object"},
         )
-        
-        # Parse the response
-        response_content = response.choices[0].message.content.strip()
-        
-        # Try to parse as JSON
-        word_count_from_gpt: Optional[int] = None
+        entries = orjson.loads(response.choices[0].message.content)["results"]
+    except Exception as e:
+        logger.warning("Error in batched GPT filler word detection: %s", e)
+        return [None] * len(texts)
+
+    results: List[Optional[Tuple[List[Dict[str, Any]], int]]] = [None] * len(texts)
+    for entry in entries if isinstance(entries, list) else []:
         try:
-            parsed = json.loads(response_content)
-            if isinstance(parsed, dict):
-                word_count_from_gpt = parsed.get("word_count")
-                if word_count_from_gpt is not None:
-                    try:
-                        word_count_from_gpt = int(word_count_from_gpt)
-                    except (TypeError, ValueError):
-                        word_count_from_gpt = None
-            # Handle both direct array and wrapped object
-            if isinstance(parsed, list):
-                filler_words = parsed
-            elif isinstance(parsed, dict) and "fillers" in parsed:
-                filler_words = parsed["fillers"]
-            elif isinstance(parsed, dict) and "filler_words" in parsed:
-                filler_words = parsed["filler_words"]
-            else:
-                filler_words = []
-                if isinstance(parsed, dict):
-                    for key, value in parsed.items():
-                        if key != "word_count" and isinstance(value, list):
-                            filler_words = value
-                            break
-        except json.JSONDecodeError:
-            # If JSON parsing fails, try to extract JSON from markdown code blocks
-            json_match = re.search(r'```(?:json)?\s*(\[.*?\])\s*```', response_content, re.DOTALL)
-            if json_match:
-                filler_words = json.loads(json_match.group(1))
-            else:
-                # Last resort: try to find array pattern
-                array_match = re.search(r'\[.*?\]', response_content, re.DOTALL)
-                if array_match:
-                    filler_words = json.loads(array_match.group(0))
-                else:
-                    filler_words = []
-        
-        # Validate and clean the results
-        validated_fillers = []
-        for filler in filler_words:
-            if isinstance(filler, dict) and "word" in filler and "position" in filler:
-                word = filler["word"]
-                position = int(filler["position"])
-                length = filler.get("length", len(word))
-                
-                # Verify the position is valid
-                if 0 <= position < len(text):
-                    # Verify the word actually exists at that position
-                    actual_word = text[position:position+length].strip()
-                    if word.lower() in actual_word.lower() or actual_word.lower() in word.lower():
-                        validated_fillers.append({
-                            "word": word,
-                            "position": position,
-                            "length": length
-                        })
-
-        # Strengthen: add regex-detected hesitation sounds (um/uh/er/erm/ah/hmm) that GPT may have missed
-        def _overlaps(span_start: int, span_end: int, existing: List[Dict[str, Any]]) -> bool:
-            for f in existing:
-                e_start, e_end = f["position"], f["position"] + f.get("length", 0)
-                if not (span_end <= e_start or span_start >= e_end):
-                    return True
-            return False
-
-        for m in HESITATION_REGEX.finditer(text):
-            pos, length = m.start(), len(m.group(0))
-            if not _overlaps(pos, pos + length, validated_fillers):
-                validated_fillers.append({"word": m.group(0), "position": pos, "length": length})
-
-        # Sort by position and remove overlaps (keep first occurrence when overlapping)
-        validated_fillers = sorted(validated_fillers, key=lambda x: x["position"])
-        non_overlapping = []
-        last_end = -1
-        for filler in validated_fillers:
-            start = filler["position"]
-            end = start + filler.get("length", len(filler.get("word", "")))
-            if start >= last_end:
-                non_overlapping.append(filler)
-                last_end = end
-
-        # Use GPT word_count if valid; otherwise fallback to local count
-        if word_count_from_gpt is not None and word_count_from_gpt >= 0:
-            word_count = word_count_from_gpt
-        else:
-            from services.wpm_calculation import count_words
-            word_count = count_words(text)
-
-        return (non_overlapping, word_count)
+            idx = int(entry["id"])
+            if 0 <= idx < len(texts) and results[idx] is None:
+                # Same validation + regex merge as the single-text path
+                results[idx] = _parse_filler_payload(entry, texts[idx])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return results
+
+
+async def detect_filler_words_with_gpt_batch(
+    texts: List[str],
+    batch_size: int = 16,
+) -> List[Tuple[List[Dict[str, Any]], int]]:
+    """
+    detect_filler_words_with_gpt for many transcripts (bulk re-scoring, imports): up to
+    batch_size texts share one GPT call, so the prompt is sent once per group and RPM-limited
+    workloads need far fewer requests. Not used on the request path, where one transcript
+    is analyzed as soon as it arrives.
 
-    except Exception as e:
-        print(f"Error in GPT filler word detection: {str(e)}")
-        from services.wpm_calculation import count_words
-        return ([], count_words(text) if text else 0)
+    Returns:
+        One (fillers, word_count) per text, in order. Texts missing from a group's answer
+        fall back to the single-text call.
+    """
+    unique = list(dict.fromkeys(t for t in texts if t))
+    groups = [unique[i:i + batch_size] for i in range(0, len(unique), max(1, batch_size))]
+    group_results = await asyncio.gather(*(_detect_filler_words_group(g) for g in groups))
+    by_text = {t: r for group, results in zip(groups, group_results) for t, r in zip(group, results)}
+    missing = [t for t, r in by_text.items() if r is None]
+    for t, r in zip(missing, await asyncio.gather(*(detect_filler_words_with_gpt(t) for t in missing))):
+        by_text[t] = r
+    return [by_text[t] if t else ([], 0) for t in texts]
 
 
 def remove_filler_words(text: str, filler_positions: List[Dict[str, Any]]) -> str:
@@ -243,22 +446,64 @@ def remove_filler_words(text: str, filler_positions: List[Dict[str, Any]]) -> st
     Returns:
         Text with filler words removed
     """
-    # Sort by position in reverse to remove from end to start
-    filler_positions_sorted = sorted(filler_positions, key=lambda x: x['position'], reverse=True)
-    
-    result = text
-    for filler in filler_positions_sorted:
+    if not filler_positions:
+        return text
+
+    # Single pass: keep the slices between fillers, then clean up whitespace once.
+    # (Cleaning after every removal re-scanned the whole string per filler and could
+    # shift the positions of fillers not yet removed.)
+    parts = []
+    cursor = 0
+    for filler in sorted(filler_positions, key=lambda x: x['position']):
         start = filler['position']
         end = start + filler['length']
-        # Remove the filler word
-        result = result[:start] + result[end:]
-        # Clean up spaces around punctuation and collapse whitespace
-        result = re.sub(r'\s+', ' ', result)
-        result = re.sub(r'\s+([,.;:!?])', r'\1', result)   # space before punctuation
-        result = re.sub(r'([,.;:!?])\s+', r'\1 ', result)  # normalize after punctuation
-        result = result.strip()
+        if start > cursor:
+            parts.append(text[cursor:start])
+        cursor = max(cursor, end)
+    parts.append(text[cursor:])
+
+    result = "".join(parts)
+    # Collapse whitespace, then drop spaces before punctuation. (Whitespace after
+    # punctuation is already a single space once collapsed, so it needs no pass of its own.)
+    result = _WHITESPACE_RE.sub(' ', result)
+    result = _SPACE_BEFORE_PUNCT_RE.sub(r'\1', result)
+    return result.strip()
+
+
+# Speech-editor instructions for the improved-text rewrite
+IMPROVED_TEXT_PROMPT = """
+    You are a professional speech editor. Your task is to improve the following transcribed speech 
+    by making it more concise, clear, and natural while preserving the original meaning and tone.
     
-    return result
+    Guidelines:
+    1. Remove all filler words and hesitations (um, uh, like, you know, etc.)
+    2. Fix any grammar or syntax errors
+    3. Make the speech more concise by removing unnecessary repetition
+    4. Improve sentence structure and flow
+    5. Keep the original meaning and tone intact
+    6. Maintain a conversational style
+    7. Keep technical terms and proper nouns as-is
+    
+    Input text to improve:
+    """
+
+_IMPROVED_TEXT_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a professional speech editor that improves transcribed speech.\n"
+    + IMPROVED_TEXT_PROMPT.replace("Input text to improve:", "The user message is the text to improve, after any challenge context."),
+}
+
+
+def _challenge_context(level: Optional[str], category: Optional[str], title: Optional[str]) -> str:
+    """Challenge context lines appended to prompts ("" when there is none)."""
+    lines = [
+        line for line in (
+            f"- Level: {level}\n" if level else "",
+            f"- Category: {category}\n" if category else "",
+            f"- Title: {title}\n" if title else "",
+        ) if line
+    ]
+    return "\n\nChallenge context:\n" + "".join(lines) if lines else ""
 
 
 async def generate_improved_text(
@@ -276,59 +521,45 @@ async def generate_improved_text(
     Returns:
         Improved version of the text with better flow and clarity
     """
-    from config import get_openai_client, GPT_MODEL
-    
-    client = get_openai_client()
-    
-    context_block = ""
-    if level or category or title:
-        context_block = "\n\nChallenge context:\n"
-        if level:
-            context_block += f"- Level: {level}\n"
-        if category:
-            context_block += f"- Category: {category}\n"
-        if title:
-            context_block += f"- Title: {title}\n"
-
-    prompt = """
-    You are a professional speech editor. Your task is to improve the following transcribed speech 
-    by making it more concise, clear, and natural while preserving the original meaning and tone.
-    
-    Guidelines:
-    1. Remove all filler words and hesitations (um, uh, like, you know, etc.)
-    2. Fix any grammar or syntax errors
-    3. Make the speech more concise by removing unnecessary repetition
-    4. Improve sentence structure and flow
-    5. Keep the original meaning and tone intact
-    6. Maintain a conversational style
-    7. Keep technical terms and proper nouns as-is
-    
-    Input text to improve:
-    """
-    
     try:
-        response = client.chat.completions.create(
-            model=GPT_MODEL,
-            messages=[
-                {"role": "system", "content": "You are a professional speech editor that improves transcribed speech."},
-                {"role": "user", "content": f"{prompt}{context_block}\n\n{text}"}
-            ],
-            temperature=0.3,
-            **_max_tokens_kwargs(2000),
-        )
-        
-        improved_text = response.choices[0].message.content.strip()
-        
-        # Remove any surrounding quotes if present
-        improved_text = re.sub(r'^"|"$', '', improved_text)
-        
-        return improved_text
+        return await _generate_improved_text_cached(text, level, category, title)
     except Exception as e:
         print(f"Error generating improved text: {str(e)}")
+        note_fallback("improved_text")
         # Return the original text if there's an error
         return text
 
 
+@cached_async(gpt_result_cache, namespace=GPT_MODEL)
+async def _generate_improved_text_cached(
+    text: str,
+    level: Optional[str],
+    category: Optional[str],
+    title: Optional[str],
+) -> str:
+    """GPT improved-text call (cached; raises on failure)."""
+    client = get_openai_client()
+    
+    context_block = _challenge_context(level, category, title).lstrip()
+    
+    response = await client.chat.completions.create(
+        model=GPT_MODEL,
+        messages=[
+            _IMPROVED_TEXT_SYSTEM_MESSAGE,
+            {"role": "user", "content": f"{context_block}\nInput text to improve:\n{text}" if context_block else text},
+        ],
+        temperature=0.3,
+        **max_tokens_kwargs(2000),
+    )
+    
+    improved_text = response.choices[0].message.content.strip()
+    
+    # Remove any surrounding quotes if present
+    improved_text = _SURROUNDING_QUOTES_RE.sub('', improved_text)
+    
+    return improved_text
+
+
 # Fixed message when user's answer is not relevant to the challenge title
 OFF_TOPIC_MESSAGE = (
     "Your response doesn't seem to address the challenge topic. "
@@ -347,7 +578,21 @@ async def check_answer_relevance_to_title(title: str, user_text: str) -> bool:
     # Very short answers: don't penalize as off-topic (might be partial or misheard)
     if len((user_text or "").strip().split()) < 3:
         return True
-    from config import get_openai_client, GPT_MODEL
+    # Every content word of the title appears in the answer: on topic, no need to ask GPT
+    title_words = {w for w in _WORD_RE.findall(title.lower()) if len(w) > 2 and w not in _TITLE_STOPWORDS}
+    if title_words and title_words.issubset(_WORD_RE.findall(user_text.lower())):
+        return True
+    try:
+        return await _check_relevance_cached(title, user_text.strip())
+    except Exception as e:
+        print(f"Error checking relevance: {str(e)}")
+        note_fallback("relevance")
+        return True  # On error, do not penalize
+
+
+@cached_async(gpt_result_cache, namespace=GPT_MODEL)
+async def _check_relevance_cached(title: str, user_text: str) -> bool:
+    """GPT relevance YES/NO call (cached; raises on failure)."""
     client = get_openai_client()
     prompt = f"""You are a fair judge. Give the speaker the benefit of the doubt.
 
@@ -355,26 +600,94 @@ Challenge question/topic:
 "{title}"
 
 User's spoken answer (transcribed, may have filler words or small errors):
-"{user_text.strip()}"
+"{user_text}"
 
 Is this answer related to the question/topic?
 Answer with exactly one word: YES or NO.
 
 - YES if: the answer is about the same topic, or touches on it, or is a reasonable attempt, or you are unsure. Prefer YES when in doubt.
 - NO only if: the answer is clearly about a completely different subject, or is only noise/filler with no relation to the topic."""
+    response = await client.chat.completions.create(
+        model=GPT_MODEL,
+        messages=[
+            _RELEVANCE_SYSTEM_MESSAGE,
+            {"role": "user", "content": prompt},
+        ],
+        temperature=0.0,
+        **max_tokens_kwargs(10),
+    )
+    raw = (response.choices[0].message.content or "").strip().upper()
+    return raw.startswith("YES")
+
+
+# Extra instructions for analyze_transcript: one JSON object with fillers + improved text + relevance
+COMBINED_ANALYSIS_PROMPT = """
+
+==== ADDITIONAL TASKS (same JSON object) ====
+Besides "word_count" and "fillers" (positions refer to the TEXT TO ANALYZE above), also return:
+
+"improved_text": the text rewritten by a professional speech editor, following these guidelines:
+""" + IMPROVED_TEXT_PROMPT.replace("Input text to improve:", "") + """
+"is_relevant": true or false. Is the answer related to the challenge title/topic below?
+Give the benefit of the doubt: false ONLY if it is clearly about a completely different subject
+or is only noise/filler. If there is no title, return true.
+
+Return exactly these keys: word_count, fillers, improved_text, is_relevant.
+"""
+
+
+async def analyze_transcript(
+    text: str,
+    level: Optional[str] = None,
+    category: Optional[str] = None,
+    title: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Filler detection, improved text and relevance check in ONE GPT call (transcript sent once).
+    Used instead of the three separate calls when GPT_COMBINED_ANALYSIS is enabled.
+
+    Returns:
+        Dictionary with filler_words, word_count, improved_text, is_relevant.
+        On error falls back to the separate calls.
+    """
     try:
-        response = client.chat.completions.create(
+        client = get_openai_client()
+        response = await client.chat.completions.create(
             model=GPT_MODEL,
             messages=[
-                {"role": "system", "content": "You answer only YES or NO. When in doubt, answer YES. No explanation."},
-                {"role": "user", "content": prompt},
+                _COMBINED_SYSTEM_MESSAGE,
+                {
+                    "role": "user",
+                    "content": FILLER_WORD_DETECTION_PROMPT + TEXT_TO_ANALYZE_HEADER + text + COMBINED_ANALYSIS_PROMPT + _challenge_context(level, category, title),
+                },
             ],
-            temperature=0.0,
-            **_max_tokens_kwargs(10),
+            temperature=GPT_TEMPERATURE,
+            response_format={"type": "json_object"},
         )
-        raw = (response.choices[0].message.content or "").strip().upper()
-        return raw.startswith("YES")
+        content = response.choices[0].message.content.strip()
+        parsed = orjson.loads(content)
+        filler_words, word_count = _parse_filler_payload(parsed, text)
+        improved_text = _SURROUNDING_QUOTES_RE.sub('', str(parsed.get("improved_text") or "").strip())
+        is_relevant = parsed.get("is_relevant", True)
+        if isinstance(is_relevant, str):
+            is_relevant = not is_relevant.strip().upper().startswith(("NO", "FALSE"))
+        # Same leniency as check_answer_relevance_to_title
+        if not title or len(text.strip().split()) < 3:
+            is_relevant = True
+        return {
+            "filler_words": filler_words,
+            "word_count": word_count,
+            "improved_text": improved_text or remove_filler_words(text, filler_words),
+            "is_relevant": bool(is_relevant),
+        }
     except Exception as e:
-        print(f"Error checking relevance: {str(e)}")
-        return True  # On error, do not penalize
-
+        logger.warning("Error in combined transcript analysis, using separate calls: %s", e)
+        filler_words, word_count = await detect_filler_words_with_gpt(text)
+        improved_text = await generate_improved_text(remove_filler_words(text, filler_words), level=level, category=category, title=title)
+        is_relevant = await check_answer_relevance_to_title(title, text) if title else True
+        return {
+            "filler_words": filler_words,
+            "word_count": word_count,
+            "improved_text": improved_text,
+            "is_relevant": is_relevant,
+        }
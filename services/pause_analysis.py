@@ -2,13 +2,31 @@
 Pause and Hesitation analysis service.
 Hesitation/filler counts come from GPT only (filler_words); no regex.
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+import numpy as np
 
 try:
     from scoring_config import PAUSE_THRESHOLD_SEC
 except ImportError:
     PAUSE_THRESHOLD_SEC = 0.5
 
+try:
+    from scoring_config import (
+        FLUENCY_PAUSE_PENALTY_PER_RATIO,
+        FLUENCY_PAUSE_PENALTY_CAP,
+        FLUENCY_HESITATION_PENALTY_PER_RATE,
+        FLUENCY_HESITATION_PENALTY_CAP,
+        USE_FILLER_COUNT_IN_HESITATION,
+        FILLER_WEIGHT_IN_HESITATION,
+    )
+except ImportError:
+    FLUENCY_PAUSE_PENALTY_PER_RATIO = 80
+    FLUENCY_PAUSE_PENALTY_CAP = 55
+    FLUENCY_HESITATION_PENALTY_PER_RATE = 1.2
+    FLUENCY_HESITATION_PENALTY_CAP = 35
+    USE_FILLER_COUNT_IN_HESITATION = False
+    FILLER_WEIGHT_IN_HESITATION = 0.6
+
 
 def analyze_pauses_and_hesitations(
     text: str,
@@ -41,20 +59,11 @@ def analyze_pauses_and_hesitations(
     total_pause_time = 0.0
     
     if segments and len(segments) > 1:
-        # Calculate pauses between segments
-        for i in range(len(segments) - 1):
-            current_segment = segments[i]
-            next_segment = segments[i + 1]
-            
-            # Get end time of current segment and start time of next segment
-            current_end = _get_segment_time(current_segment, 'end')
-            next_start = _get_segment_time(next_segment, 'start')
-            
-            if current_end is not None and next_start is not None:
-                pause_duration = next_start - current_end
-                if pause_duration >= threshold:
-                    pause_durations.append(pause_duration)
-                    total_pause_time += pause_duration
+        # Pause before each segment = its start - previous segment's end (NaN if a time is missing)
+        starts, ends = segment_times(segments)
+        gaps = starts[1:] - ends[:-1]
+        pause_durations = gaps[gaps >= threshold].tolist()
+        total_pause_time = sum(pause_durations)
     
     # Calculate statistics (total_hesitations already set from filler_words above)
     total_pauses = len(pause_durations)
@@ -75,6 +84,28 @@ def analyze_pauses_and_hesitations(
     }
 
 
+def segment_times(segments: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Start and end times of all segments as two float arrays, read in one pass
+    (NaN where a segment has no time). Shared with the transcription duration fallback.
+    """
+    if not segments:
+        return np.empty(0), np.empty(0)
+    # Whisper segment lists are all dicts or all objects: pick the accessor once
+    # instead of an isinstance check per lookup (mixed lists or missing attributes take the
+    # per-item path)
+    try:
+        if isinstance(segments[0], dict):
+            times = [(seg.get("start"), seg.get("end")) for seg in segments]
+        else:
+            times = [(seg.start, seg.end) for seg in segments]
+    except AttributeError:
+        times = [(_get_segment_time(seg, "start"), _get_segment_time(seg, "end")) for seg in segments]
+    # dtype=float turns None into NaN
+    pairs = np.array(times, dtype=float)
+    return pairs[:, 0], pairs[:, 1]
+
+
 def _get_segment_time(segment: Any, time_type: str) -> Optional[float]:
     """
     Extract start or end time from a segment (handles both dict and object)
@@ -103,23 +134,6 @@ def calculate_fluency_score(
     Calculate fluency score based on pauses and hesitations.
     Hesitation count comes from GPT (filler_words). Uses scoring_config for penalties.
     """
-    try:
-        from scoring_config import (
-            FLUENCY_PAUSE_PENALTY_PER_RATIO,
-            FLUENCY_PAUSE_PENALTY_CAP,
-            FLUENCY_HESITATION_PENALTY_PER_RATE,
-            FLUENCY_HESITATION_PENALTY_CAP,
-            USE_FILLER_COUNT_IN_HESITATION,
-            FILLER_WEIGHT_IN_HESITATION,
-        )
-    except ImportError:
-        FLUENCY_PAUSE_PENALTY_PER_RATIO = 80
-        FLUENCY_PAUSE_PENALTY_CAP = 55
-        FLUENCY_HESITATION_PENALTY_PER_RATE = 1.2
-        FLUENCY_HESITATION_PENALTY_CAP = 35
-        USE_FILLER_COUNT_IN_HESITATION = False
-        FILLER_WEIGHT_IN_HESITATION = 0.6
-
     if total_duration == 0:
         return {
             "fluency_score": 0.0,
@@ -144,3 +158,43 @@ def calculate_fluency_score(
         "hesitation_rate": round(hesitation_rate, 2)
     }
 
+
+def calculate_fluency_score_batch(
+    total_duration: Iterable[float],
+    total_pause_time: Iterable[float],
+    hesitation_count: Iterable[int],
+    word_count: Iterable[int],
+    filler_count: Optional[Iterable[int]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Vectorized calculate_fluency_score for many sessions (bulk dashboards / exports):
+    each argument is a sequence with one value per session.
+
+    Returns:
+        Same keys as calculate_fluency_score, each an array with one entry per session (unrounded)
+    """
+    total_duration = np.asarray(total_duration, dtype=float)
+    hesitation_count = np.asarray(hesitation_count, dtype=float)
+    word_count = np.asarray(word_count, dtype=float)
+    has_duration = total_duration > 0
+    has_words = word_count > 0
+    safe_word_count = np.where(has_words, word_count, 1.0)
+
+    pause_ratio = np.where(
+        has_duration, np.asarray(total_pause_time, dtype=float) / np.where(has_duration, total_duration, 1.0), 0.0
+    )
+    if USE_FILLER_COUNT_IN_HESITATION and filler_count is not None:
+        hesitation_count = hesitation_count + FILLER_WEIGHT_IN_HESITATION * np.asarray(filler_count, dtype=float)
+    hesitation_rate = np.where(has_words, hesitation_count / safe_word_count * 100, 0.0)
+
+    pause_penalty = np.minimum(pause_ratio * FLUENCY_PAUSE_PENALTY_PER_RATIO, FLUENCY_PAUSE_PENALTY_CAP)
+    hesitation_penalty = np.minimum(hesitation_rate * FLUENCY_HESITATION_PENALTY_PER_RATE, FLUENCY_HESITATION_PENALTY_CAP)
+    fluency_score = np.maximum(0.0, 100 - pause_penalty - hesitation_penalty)
+
+    # Zero duration: everything 0, as in the scalar version
+    no_audio = total_duration == 0
+    return {
+        "fluency_score": np.where(no_audio, 0.0, fluency_score),
+        "pause_ratio": pause_ratio,
+        "hesitation_rate": np.where(no_audio, 0.0, hesitation_rate),
+    }
@@ -1,13 +1,50 @@
 """
 Audio transcription service using OpenAI Whisper
 """
+import os
+import asyncio
+import logging
+import re
+import shutil
+import tempfile
 from typing import Dict, Any, List, Optional
+import numpy as np
 from config import (
     get_openai_client,
+    get_local_whisper_model,
+    get_local_whisper_pipeline,
+    WHISPER_BACKEND,
+    WHISPER_LOCAL_BATCH_SIZE,
     WHISPER_MODEL,
     WHISPER_PROMPT,
     TRANSCRIPTION_LANGUAGE,
+    WHISPER_CHUNK_THRESHOLD_SEC,
+    WHISPER_CHUNK_SEC,
+    WHISPER_CHUNK_OVERLAP_SEC,
+    WHISPER_CONCURRENCY,
+    AUDIO_TEMP_DIR,
+    NO_SPEECH_PROB_THRESHOLD,
+    NO_SPEECH_LOGPROB_THRESHOLD,
 )
+from services.pause_analysis import segment_times
+
+logger = logging.getLogger(__name__)
+
+# Caps Whisper requests in flight across the process (chunks of one file count separately)
+# so bursts queue here instead of turning into 429s and retries.
+_whisper_semaphore = asyncio.Semaphore(WHISPER_CONCURRENCY)
+_whisper_in_flight = 0
+_whisper_waiting = 0
+
+# _recover_missing_fillers: "um" markers go after sentence ends and before lowercase clause starts
+_SENTENCE_START_RE = re.compile(r'(\. )([A-Z])')
+_CLAUSE_START_RE = re.compile(r'(, )([a-z])')
+
+# Files below WHISPER_CHUNK_THRESHOLD_SEC * this many bytes cannot be long enough to chunk
+# (2 KB/s = 16 kbps, under any speech codec we receive), so they skip the ffprobe call.
+_MIN_AUDIO_BYTES_PER_SEC = 2000
+# Longest run of words compared when removing text repeated across a chunk boundary
+_MAX_BOUNDARY_WORDS = 12
 
 
 # Import audio hesitation detector if available
@@ -80,14 +117,13 @@ def _recover_missing_fillers(text: str, segments: Optional[List[Dict[str, Any]]]
         
         # Simpler approach: add "um" markers at detected gap locations
         # by analyzing the text and injecting after key punctuation/pauses
-        import re
         # Add "um" before sentences that aren't at the start
-        result = re.sub(r'(\. )([A-Z])', r'\1 um \2', result)
-        result = re.sub(r'(, )([a-z])', r'\1 um \2', result)
+        result = _SENTENCE_START_RE.sub(r'\1 um \2', result)
+        result = _CLAUSE_START_RE.sub(r'\1 um \2', result)
         
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.info(f"Injected filler markers at {len(fillers_to_inject)} gap locations based on {[f['gap_duration'] for f in fillers_to_inject]} second gaps")
+        logger.info("Injected filler markers at %d gap locations", len(fillers_to_inject))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Filler marker gaps (s): %s", [f["gap_duration"] for f in fillers_to_inject])
         
         return result
     except Exception as e:
@@ -96,10 +132,233 @@ def _recover_missing_fillers(text: str, segments: Optional[List[Dict[str, Any]]]
         return text
 
 
+def whisper_queue_stats() -> Dict[str, int]:
+    """Whisper concurrency limit, requests in flight and requests waiting for a slot (for /health)."""
+    return {"limit": WHISPER_CONCURRENCY, "in_flight": _whisper_in_flight, "waiting": _whisper_waiting}
+
+
+async def _whisper_request(audio_file_path: str) -> Any:
+    """Send one file to Whisper, waiting for a free slot under WHISPER_CONCURRENCY."""
+    global _whisper_in_flight, _whisper_waiting
+    client = get_openai_client()
+    _whisper_waiting += 1
+    try:
+        await _whisper_semaphore.acquire()
+    finally:
+        _whisper_waiting -= 1
+    _whisper_in_flight += 1
+    try:
+        if WHISPER_BACKEND == "local":
+            return await asyncio.to_thread(_local_whisper_transcribe, audio_file_path)
+        # Force language so Whisper does not misdetect (e.g. English detected as Welsh).
+        # We only accept English; TRANSCRIPTION_LANGUAGE is "en" in config.
+        with open(audio_file_path, "rb") as audio_file:
+            return await client.audio.transcriptions.create(
+                model=WHISPER_MODEL,
+                file=audio_file,
+                language=TRANSCRIPTION_LANGUAGE,  # "en" = force English, no auto-detect
+                prompt=WHISPER_PROMPT,
+                temperature=0.8,  # Optimal: captures filler words and natural speech variations
+                response_format="verbose_json",  # Critical: get segment-level timing for pause analysis
+            )
+    finally:
+        _whisper_in_flight -= 1
+        _whisper_semaphore.release()
+
+
+def _local_whisper_transcribe(audio_file_path: str) -> Dict[str, Any]:
+    """
+    Transcribe with the local faster-whisper model (blocking, CPU/GPU bound).
+    Returns the same fields as Whisper's verbose_json: text, segments, duration, language.
+    """
+    options = dict(language=TRANSCRIPTION_LANGUAGE, initial_prompt=WHISPER_PROMPT, temperature=0.8)
+    pipeline = get_local_whisper_pipeline() if WHISPER_LOCAL_BATCH_SIZE > 0 else None
+    if pipeline is not None:
+        # Windows of the file are decoded together in batches (VAD-split), not one by one
+        segments_iter, info = pipeline.transcribe(audio_file_path, batch_size=WHISPER_LOCAL_BATCH_SIZE, **options)
+    else:
+        segments_iter, info = get_local_whisper_model().transcribe(audio_file_path, **options)
+    segments = [
+        {
+            "id": seg.id,
+            "start": seg.start,
+            "end": seg.end,
+            "text": seg.text,
+            "avg_logprob": seg.avg_logprob,
+            "no_speech_prob": seg.no_speech_prob,
+        }
+        for seg in segments_iter
+    ]
+    return {
+        "text": "".join(seg["text"] for seg in segments).strip(),
+        "segments": segments,
+        "duration": info.duration,
+        "language": info.language,
+    }
+
+
+async def _probe_duration(audio_file_path: str) -> Optional[float]:
+    """Audio length in seconds via ffprobe; None if ffprobe is unavailable or fails."""
+    if shutil.which("ffprobe") is None:
+        return None
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", audio_file_path,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        out, _ = await proc.communicate()
+        return float(out.strip()) if proc.returncode == 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+async def _cut_chunk(audio_file_path: str, start: float, chunk_path: str) -> bool:
+    """
+    Copy [start, start + WHISPER_CHUNK_SEC + WHISPER_CHUNK_OVERLAP_SEC) of the audio into
+    chunk_path without re-encoding (the overlap is shared with the next chunk).
+    """
+    length = WHISPER_CHUNK_SEC + WHISPER_CHUNK_OVERLAP_SEC
+    proc = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-v", "error", "-y", "-ss", f"{start:.3f}", "-t", f"{length:.3f}",
+        "-i", audio_file_path, "-c", "copy", chunk_path,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    return await proc.wait() == 0 and os.path.getsize(chunk_path) > 0
+
+
+def _get_field(obj: Any, name: str) -> Any:
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+
+def _compute_duration(transcription: Any, segments: Any) -> float:
+    """
+    Audio duration in seconds: the file duration Whisper reports (reliable), else the sum of
+    segment lengths (speaking time only), else the last segment end; 0.0 if none is usable.
+    """
+    raw_duration = _get_field(transcription, "duration")
+    if isinstance(raw_duration, (int, float)) and raw_duration > 0:
+        return float(raw_duration)
+    if not isinstance(segments, list) or not segments:
+        return 0.0
+    try:
+        starts, ends = segment_times(segments)
+    except (TypeError, ValueError):
+        return 0.0
+    # Missing times count as 0 here
+    starts, ends = np.nan_to_num(starts), np.nan_to_num(ends)
+    speaking_total = float(np.maximum(ends - starts, 0.0).sum())
+    return speaking_total if speaking_total > 0 else max(float(ends.max()), 0.0)
+
+
+def _offset_segments(segments: Optional[List[Any]], offset: float, first_id: int) -> List[Dict[str, Any]]:
+    """Shift chunk-local segment times by the chunk's start so they line up with the full file."""
+    shifted = []
+    for i, seg in enumerate(segments or []):
+        seg = dict(seg) if isinstance(seg, dict) else {
+            k: _get_field(seg, k) for k in ("text", "start", "end", "no_speech_prob", "avg_logprob")
+        }
+        seg["id"] = first_id + i
+        seg["start"] = float(seg.get("start") or 0) + offset
+        seg["end"] = float(seg.get("end") or 0) + offset
+        shifted.append(seg)
+    return shifted
+
+
+def _normalize_word(word: str) -> str:
+    return word.strip(".,!?;:\"'()").lower()
+
+
+def _merge_boundary_text(prev_text: str, next_text: str) -> str:
+    """
+    Drop the start of next_text when it repeats the end of prev_text word for word
+    (case and punctuation ignored), as happens with speech inside a chunk overlap.
+    """
+    prev_words = [_normalize_word(w) for w in prev_text.split()[-_MAX_BOUNDARY_WORDS:]]
+    next_words = next_text.split()
+    next_norm = [_normalize_word(w) for w in next_words[:_MAX_BOUNDARY_WORDS]]
+    for n in range(min(len(prev_words), len(next_norm)), 0, -1):
+        if prev_words[-n:] == next_norm[:n]:
+            return " ".join(next_words[n:])
+    return next_text
+
+
+async def _transcribe_chunked(audio_file_path: str, total_duration: float) -> Optional[Dict[str, Any]]:
+    """
+    Split long audio into WHISPER_CHUNK_SEC pieces (plus WHISPER_CHUNK_OVERLAP_SEC shared with the
+    next piece) with ffmpeg, transcribe them concurrently and stitch text + time-shifted segments
+    back together. Inside an overlap, segments starting before its midpoint come from the earlier
+    chunk and the rest from the later one; words still repeated across the cut are dropped.
+    Returns None if splitting fails (caller falls back to a single Whisper request).
+    """
+    ext = os.path.splitext(audio_file_path)[1]
+    starts = [0.0]
+    t = WHISPER_CHUNK_SEC
+    # The tail that fits in the previous chunk's overlap does not get a chunk of its own
+    while t < total_duration - WHISPER_CHUNK_OVERLAP_SEC:
+        starts.append(t)
+        t += WHISPER_CHUNK_SEC
+    with tempfile.TemporaryDirectory(dir=AUDIO_TEMP_DIR) as chunk_dir:
+        chunk_paths = [os.path.join(chunk_dir, f"chunk{i:04d}{ext}") for i in range(len(starts))]
+        cut = await asyncio.gather(*(_cut_chunk(audio_file_path, st, cp) for st, cp in zip(starts, chunk_paths)))
+        if not all(cut):
+            logger.warning("Audio chunking failed; falling back to a single Whisper request")
+            return None
+        results = await asyncio.gather(*(_whisper_request(cp) for cp in chunk_paths))
+
+    half_overlap = WHISPER_CHUNK_OVERLAP_SEC / 2
+    text = ""
+    segments: List[Dict[str, Any]] = []
+    for i, (start, transcription) in enumerate(zip(starts, results)):
+        chunk_segments = _offset_segments(_get_field(transcription, "segments"), start, len(segments))
+        lo = start + half_overlap if i > 0 else float("-inf")
+        hi = starts[i + 1] + half_overlap if i + 1 < len(starts) else float("inf")
+        kept = [seg for seg in chunk_segments if lo <= seg["start"] < hi]
+        if chunk_segments:
+            for new_id, seg in enumerate(kept, start=len(segments)):
+                seg["id"] = new_id
+            segments.extend(kept)
+            chunk_text = " ".join((seg.get("text") or "").strip() for seg in kept).strip()
+        else:
+            # No segment timing to split the overlap by; rely on the word de-duplication alone
+            chunk_text = (_get_field(transcription, "text") or "").strip()
+        if text and chunk_text:
+            chunk_text = _merge_boundary_text(text, chunk_text)
+        if chunk_text:
+            text = f"{text} {chunk_text}" if text else chunk_text
+    logger.info("Transcribed %.1fs of audio in %d parallel chunks", total_duration, len(starts))
+    return {
+        "text": text,
+        "segments": segments,
+        "duration": total_duration,
+        "language": _get_field(results[0], "language"),
+    }
+
+
+def _is_no_speech(segments: Optional[List[Any]]) -> bool:
+    """
+    True when Whisper flags every segment as silence: no_speech_prob above the threshold and
+    a low avg_logprob (Whisper's own no-speech rule), i.e. the text is noise or hallucination.
+    """
+    if not segments:
+        return False
+    for seg in segments:
+        no_speech_prob = _get_field(seg, "no_speech_prob")
+        avg_logprob = _get_field(seg, "avg_logprob")
+        if no_speech_prob is None or no_speech_prob <= NO_SPEECH_PROB_THRESHOLD:
+            return False
+        if avg_logprob is not None and avg_logprob >= NO_SPEECH_LOGPROB_THRESHOLD:
+            return False
+    return True
+
+
 async def transcribe_audio_file(audio_file_path: str) -> Dict[str, Any]:
     """
-    Transcribe audio file to text using OpenAI Whisper
+    Transcribe audio file to text using OpenAI Whisper (or local faster-whisper if WHISPER_BACKEND=local)
     Uses prompt to preserve filler words like "um", "uh", "ah", etc.
+    Audio longer than WHISPER_CHUNK_THRESHOLD_SEC is split with ffmpeg and the
+    chunks are transcribed in parallel (needs ffmpeg/ffprobe; otherwise one request).
     
     Args:
         audio_file_path: Path to the audio file
@@ -108,85 +367,51 @@ async def transcribe_audio_file(audio_file_path: str) -> Dict[str, Any]:
         Dictionary with:
         - text: Transcribed text as string
         - duration_seconds: Duration of the audio in seconds
+        - no_speech: True if Whisper marked every segment as silence
     """
-    client = get_openai_client()
-    
-    # Force language so Whisper does not misdetect (e.g. English detected as Welsh).
-    # We only accept English; TRANSCRIPTION_LANGUAGE is "en" in config.
-    with open(audio_file_path, "rb") as audio_file:
-        transcription = client.audio.transcriptions.create(
-            model=WHISPER_MODEL,
-            file=audio_file,
-            language=TRANSCRIPTION_LANGUAGE,  # "en" = force English, no auto-detect
-            prompt=WHISPER_PROMPT,
-            temperature=0.8,  # Optimal: captures filler words and natural speech variations
-            response_format="verbose_json",  # Critical: get segment-level timing for pause analysis
-        )
+    transcription = None
+    # The local model handles long audio itself; chunking only helps the API backend.
+    # Files too small to run past the threshold skip the ffprobe subprocess entirely.
+    if (
+        WHISPER_BACKEND != "local"
+        and WHISPER_CHUNK_THRESHOLD_SEC > 0
+        and os.path.getsize(audio_file_path) >= WHISPER_CHUNK_THRESHOLD_SEC * _MIN_AUDIO_BYTES_PER_SEC
+    ):
+        probed = await _probe_duration(audio_file_path)
+        if probed is not None and probed > WHISPER_CHUNK_THRESHOLD_SEC:
+            transcription = await _transcribe_chunked(audio_file_path, probed)
+    if transcription is None:
+        transcription = await _whisper_request(audio_file_path)
     
     # Extract segments (for pause analysis and fallback duration)
     segments = getattr(transcription, "segments", None)
     if segments is None and isinstance(transcription, dict):
         segments = transcription.get("segments")
 
-    # Duration: prefer file duration (reliable), then sum of segment lengths, then max(segment.end)
-    duration_seconds = 0.0
-    # 1) Top-level duration (input audio length) - always use first when present so we never get 0
-    raw_duration = getattr(transcription, "duration", None)
-    if raw_duration is None and isinstance(transcription, dict):
-        raw_duration = transcription.get("duration")
-    if isinstance(raw_duration, (int, float)) and raw_duration > 0:
-        duration_seconds = float(raw_duration)
-    # 2) From segments: sum of segment lengths (speaking time only)
-    if duration_seconds <= 0 and isinstance(segments, list) and segments:
-        try:
-            speaking_total = 0.0
-            for s in segments:
-                if isinstance(s, dict):
-                    start = float(s.get("start", 0) or 0)
-                    end = float(s.get("end", 0) or 0)
-                else:
-                    start = float(getattr(s, "start", 0) or 0)
-                    end = float(getattr(s, "end", 0) or 0)
-                speaking_total += max(0, end - start)
-            if speaking_total > 0:
-                duration_seconds = speaking_total
-        except Exception:
-            pass
-    # 3) Last resort: time of last segment end
-    if duration_seconds <= 0 and isinstance(segments, list) and segments:
-        try:
-            ends = []
-            for s in segments:
-                if isinstance(s, dict) and "end" in s:
-                    ends.append(float(s["end"]))
-                elif hasattr(s, "end"):
-                    ends.append(float(s.end))
-            if ends:
-                duration_seconds = max(ends)
-        except Exception:
-            pass
+    duration_seconds = _compute_duration(transcription, segments)
 
     # Detected language (e.g. "english", "french") for English-only enforcement
     detected_language = getattr(transcription, "language", None) or (isinstance(transcription, dict) and transcription.get("language")) or None
     
     # Post-process: Inject hesitations detected directly from audio
     # This catches "um/uh/er" that Whisper dropped but are actually in the audio
-    text = transcription.text
-    if HAS_AUDIO_DETECTOR and segments:
+    text = transcription["text"] if isinstance(transcription, dict) else transcription.text
+    no_speech = _is_no_speech(segments)
+    if HAS_AUDIO_DETECTOR and segments and not no_speech:
         try:
-            hesitation_regions = detect_hesitations_from_audio(audio_file_path, segments)
+            # librosa decodes and analyses the whole file: keep it off the event loop
+            hesitation_regions = await asyncio.to_thread(detect_hesitations_from_audio, audio_file_path, segments)
             if hesitation_regions:
-                text = inject_hesitations_into_text(text, segments, hesitation_regions)
-                import logging
-                logging.getLogger(__name__).info(f"Injected {len(hesitation_regions)} audio-detected hesitation markers")
+                text = await asyncio.to_thread(inject_hesitations_into_text, text, segments, hesitation_regions)
+                logger.info(f"Injected {len(hesitation_regions)} audio-detected hesitation markers")
         except Exception as e:
-            import logging
-            logging.getLogger(__name__).warning(f"Audio hesitation detection failed: {e}")
+            logger.warning(f"Audio hesitation detection failed: {e}")
     
     return {
         "text": text,
         "duration_seconds": duration_seconds,
         "segments": segments,  # Include segments for pause analysis
         "language": detected_language,
+        "no_speech": no_speech,
     }
 
@@ -2,13 +2,63 @@
 Text-to-Speech service using OpenAI's TTS model
 """
 import os
+import asyncio
 import base64
+import logging
 from pathlib import Path
-from typing import Optional, Dict, Any
-from config import get_openai_client
+from typing import Optional, Dict, Any, AsyncIterator
+from config import get_openai_client, TTS_CACHE_SIZE, TTS_CACHE_DIR, TTS_CONCURRENCY
+from services.cache import PersistentLRUCache, cached_async
+
+logger = logging.getLogger(__name__)
+
+# Optional: SIMD base64 encoder, ~40x faster than the stdlib on MP3-sized inputs (pip install pybase64)
+try:
+    import pybase64
+    HAS_PYBASE64 = True
+except ImportError:
+    HAS_PYBASE64 = False
 
 # Default voice for TTS
 DEFAULT_VOICE = "alloy"  # Options: alloy, echo, fable, onyx, nova, shimmer
+TTS_MODEL = "tts-1"
+
+# Identical (text, voice) pairs are served from here instead of a new TTS request
+tts_audio_cache = PersistentLRUCache(maxsize=TTS_CACHE_SIZE, directory=TTS_CACHE_DIR)
+
+# Caps TTS calls in flight; identical concurrent requests already share one call (cached_async)
+_tts_semaphore = asyncio.Semaphore(TTS_CONCURRENCY)
+
+
+def _b64encode_str(data: bytes) -> str:
+    """Base64 text of data (same output with or without pybase64)."""
+    if HAS_PYBASE64:
+        return pybase64.b64encode_as_string(data)
+    return base64.b64encode(data).decode('ascii')
+
+
+@cached_async(tts_audio_cache, namespace=TTS_MODEL)
+async def text_to_speech_bytes(text: str, voice: str = DEFAULT_VOICE) -> bytes:
+    """
+    Convert text to speech and return the raw MP3 bytes (no base64): for binary
+    audio/mpeg responses, files and caches, 25% smaller than the base64 form.
+    """
+    client = get_openai_client()
+    
+    try:
+        # Call OpenAI TTS API
+        async with _tts_semaphore:
+            response = await client.audio.speech.create(
+                model=TTS_MODEL,
+                voice=voice,
+                input=text,
+                response_format="mp3"
+            )
+        return response.content
+        
+    except Exception as e:
+        print(f"Error in text-to-speech conversion: {str(e)}")
+        raise ValueError(f"Failed to convert text to speech: {str(e)}")
 
 
 async def text_to_speech(text: str, voice: str = DEFAULT_VOICE) -> Dict[str, Any]:
@@ -21,31 +71,42 @@ async def text_to_speech(text: str, voice: str = DEFAULT_VOICE) -> Dict[str, Any
         
     Returns:
         Dictionary containing:
-        - audio_content: Base64 encoded audio data
+        - audio_content: Base64 encoded audio data (for JSON; see text_to_speech_bytes)
         - audio_format: Format of the audio (mp3)
         - voice: Voice used for TTS
     """
+    audio_data = await text_to_speech_bytes(text, voice)
+    return {
+        "audio_content": _b64encode_str(audio_data),
+        "audio_format": "mp3",
+        "voice": voice
+    }
+
+
+async def text_to_speech_stream(text: str, voice: str = DEFAULT_VOICE, chunk_size: int = 8192) -> AsyncIterator[str]:
+    """
+    Streaming variant of text_to_speech: yields the base64 MP3 piece by piece as the audio
+    arrives, so neither the whole MP3 nor its base64 copy is held in memory and the first
+    bytes can go out before synthesis ends (e.g. through a StreamingResponse).
+    The pieces joined together equal text_to_speech(...)["audio_content"].
+    """
     client = get_openai_client()
-    
+    pending = b""  # 0-2 bytes carried over so every piece encodes a multiple of 3 bytes (no padding)
     try:
-        # Call OpenAI TTS API
-        response = client.audio.speech.create(
-            model="tts-1",
+        async with client.audio.speech.with_streaming_response.create(
+            model=TTS_MODEL,
             voice=voice,
             input=text,
             response_format="mp3"
-        )
-        
-        # Convert audio response to base64
-        audio_data = response.content
-        audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-        
-        return {
-            "audio_content": audio_base64,
-            "audio_format": "mp3",
-            "voice": voice
-        }
-        
+        ) as response:
+            async for chunk in response.iter_bytes(chunk_size):
+                pending += chunk
+                cut = len(pending) - len(pending) % 3
+                if cut:
+                    yield _b64encode_str(pending[:cut])
+                    pending = pending[cut:]
     except Exception as e:
-        print(f"Error in text-to-speech conversion: {str(e)}")
+        logger.warning("Error in streaming text-to-speech conversion: %s", e)
         raise ValueError(f"Failed to convert text to speech: {str(e)}")
+    if pending:
+        yield _b64encode_str(pending)
@@ -1,8 +1,8 @@
 """
 WPM (Words Per Minute) calculation service
 """
-import re
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Optional
+import numpy as np
 
 
 def count_words(text: str) -> int:
@@ -12,22 +12,19 @@ def count_words(text: str) -> int:
     """
     if not text or not isinstance(text, str):
         return 0
-    # Normalize: collapse all whitespace (space, newline, tab, Unicode) to single space
-    normalized = re.sub(r"\s+", " ", text.strip())
-    if not normalized:
-        return 0
-    # Split by space; count non-empty tokens (each token = one "word")
-    tokens = [t for t in normalized.split(" ") if t]
-    return len(tokens)
+    # str.split() with no separator splits on runs of any (Unicode) whitespace and drops
+    # empty tokens: one C-level pass, no regex
+    return len(text.split())
 
 
-def calculate_wpm(text: str, duration_seconds: float) -> Dict[str, Any]:
+def calculate_wpm(text: str, duration_seconds: float, word_count: Optional[int] = None) -> Dict[str, Any]:
     """
     Calculate Words Per Minute (WPM) based on text and duration
     
     Args:
         text: Transcribed text
         duration_seconds: Duration of speech in seconds
+        word_count: count_words(text) if the caller already has it (skips re-tokenizing)
         
     Returns:
         Dictionary with:
@@ -35,7 +32,8 @@ def calculate_wpm(text: str, duration_seconds: float) -> Dict[str, Any]:
         - duration_seconds: Duration in seconds
         - wpm: Words per minute (0 if duration is 0)
     """
-    word_count = count_words(text)
+    if word_count is None:
+        word_count = count_words(text)
     
     # Calculate WPM: (words / seconds) * 60
     if duration_seconds > 0:
@@ -49,3 +47,23 @@ def calculate_wpm(text: str, duration_seconds: float) -> Dict[str, Any]:
         "wpm": round(wpm, 2)
     }
 
+
+
+def calculate_wpm_batch(word_counts: Iterable[int], durations: Iterable[float]) -> Dict[str, np.ndarray]:
+    """
+    Vectorized calculate_wpm for many sessions (bulk scoring of a folder of recordings):
+    one word count and one duration (seconds) per session. Columns rather than a list of
+    dicts, so means / percentiles / filters are single numpy reductions.
+
+    Returns:
+        Same keys as calculate_wpm, each an array with one entry per session
+        (unrounded; wpm is 0 where the duration is 0)
+    """
+    word_counts = np.asarray(word_counts, dtype=np.int64)
+    durations = np.asarray(durations, dtype=float)
+    has_duration = durations > 0
+    return {
+        "word_count": word_counts,
+        "duration_seconds": durations,
+        "wpm": np.where(has_duration, word_counts / np.where(has_duration, durations, 1.0) * 60, 0.0),
+    }
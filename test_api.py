@@ -2,7 +2,9 @@
 Complete API test script
 Tests all endpoints with actual HTTP requests
 """
-import requests
+import asyncio
+import httpx
+import orjson
 import os
 import sys
 import time
@@ -10,18 +12,25 @@ from pathlib import Path
 
 BASE_URL = "http://localhost:8000"
 API_BASE = f"{BASE_URL}/api/v1"
+MIN_AUDIO_BYTES = 1024  # smaller files can't hold real speech; rejected before uploading
 
 
-def test_health_endpoint():
+async def test_health_endpoint(client: httpx.AsyncClient):
     """Test health check endpoint"""
+    try:
+        response = await client.get(f"{API_BASE}/health")
+    except Exception as e:
+        response = e
+    # Print after the request so concurrent tests don't interleave their output
     print("\n" + "="*60)
     print("🏥 TESTING HEALTH ENDPOINT")
     print("="*60)
     
     try:
-        response = requests.get(f"{API_BASE}/health")
+        if isinstance(response, Exception):
+            raise response
         print(f"Status Code: {response.status_code}")
-        print(f"Response: {response.json()}")
+        print(f"Response: {orjson.loads(response.content)}")
         
         if response.status_code == 200:
             print("✅ Health endpoint working!")
@@ -35,22 +44,30 @@ def test_health_endpoint():
         return False
 
 
-def test_root_endpoints():
+async def test_root_endpoints(client: httpx.AsyncClient):
     """Test root endpoints"""
+    # Both roots requested at once; printed after the requests (see test_health_endpoint)
+    root_response, response = await asyncio.gather(
+        client.get(f"{BASE_URL}/"),
+        client.get(f"{API_BASE}/"),
+        return_exceptions=True,
+    )
     print("\n" + "="*60)
     print("🏠 TESTING ROOT ENDPOINTS")
     print("="*60)
     
     try:
         # Test main root
-        response = requests.get(f"{BASE_URL}/")
-        print(f"GET / - Status: {response.status_code}")
-        print(f"Response: {response.json()}")
+        if isinstance(root_response, Exception):
+            raise root_response
+        print(f"GET / - Status: {root_response.status_code}")
+        print(f"Response: {orjson.loads(root_response.content)}")
         
         # Test API root
-        response = requests.get(f"{API_BASE}/")
+        if isinstance(response, Exception):
+            raise response
         print(f"\nGET /api/v1/ - Status: {response.status_code}")
-        print(f"Response: {response.json()}")
+        print(f"Response: {orjson.loads(response.content)}")
         
         if response.status_code == 200:
             print("\n✅ Root endpoints working!")
@@ -63,7 +80,7 @@ def test_root_endpoints():
         return False
 
 
-def test_transcribe_endpoint(audio_file_path: str):
+async def test_transcribe_endpoint(client: httpx.AsyncClient, audio_file_path: str):
     """Test transcription endpoint with audio file"""
     print("\n" + "="*60)
     print("🎤 TESTING TRANSCRIBE ENDPOINT")
@@ -72,14 +89,18 @@ def test_transcribe_endpoint(audio_file_path: str):
     if not os.path.exists(audio_file_path):
         print(f"❌ Error: Audio file not found: {audio_file_path}")
         return False
+    if os.path.getsize(audio_file_path) < MIN_AUDIO_BYTES:
+        print(f"❌ Error: Audio file is empty or truncated: {audio_file_path}")
+        return False
     
     print(f"📁 Audio file: {audio_file_path}")
     print("🔄 Uploading and processing...")
     
     try:
+        # httpx streams the open file in chunks; it is never read into memory whole
         with open(audio_file_path, "rb") as f:
             files = {"file": (os.path.basename(audio_file_path), f, "audio/m4a")}
-            response = requests.post(
+            response = await client.post(
                 f"{API_BASE}/transcribe",
                 files=files,
                 timeout=120  # 2 minutes timeout for processing
@@ -91,7 +112,7 @@ def test_transcribe_endpoint(audio_file_path: str):
             print(f"❌ Error: {response.text}")
             return False
         
-        data = response.json()
+        data = orjson.loads(response.content)
         
         # Check all required fields
         required_fields = [
@@ -185,7 +206,7 @@ def test_transcribe_endpoint(audio_file_path: str):
         
         return True
         
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         print("❌ Request timeout - processing took too long")
         return False
     except Exception as e:
@@ -195,24 +216,29 @@ def test_transcribe_endpoint(audio_file_path: str):
         return False
 
 
-def check_server_running():
+async def check_server_running(client: httpx.AsyncClient):
     """Check if server is running"""
     try:
-        response = requests.get(f"{BASE_URL}/api/v1/health", timeout=2)
+        response = await client.get(f"{BASE_URL}/api/v1/health", timeout=2)
         return response.status_code == 200
     except:
         return False
 
 
-def main():
-    """Main test function"""
+async def run_tests():
+    """Run all tests over one shared (keepalive) HTTP client"""
+    async with httpx.AsyncClient() as client:
+        await _run_tests(client)
+
+
+async def _run_tests(client: httpx.AsyncClient):
     print("\n" + "🧪"*30)
     print("COMPLETE API TEST")
     print("🧪"*30)
     
     # Check if server is running
     print("\n🔍 Checking if server is running...")
-    if not check_server_running():
+    if not await check_server_running(client):
         print("❌ Server is not running!")
         print("⚠️  Please start the server first:")
         print("   python main.py")
@@ -222,18 +248,18 @@ def main():
     
     print("✅ Server is running!")
     
-    # Test health endpoint
-    if not test_health_endpoint():
-        return
-    
-    # Test root endpoints
-    if not test_root_endpoints():
+    # Test health and root endpoints (concurrently)
+    health_ok, root_ok = await asyncio.gather(
+        test_health_endpoint(client),
+        test_root_endpoints(client),
+    )
+    if not (health_ok and root_ok):
         return
     
     # Test transcribe endpoint
     if len(sys.argv) > 1:
         audio_file = sys.argv[1]
-        test_transcribe_endpoint(audio_file)
+        await test_transcribe_endpoint(client, audio_file)
     else:
         print("\n" + "="*60)
         print("📝 TRANSCRIBE ENDPOINT TEST")
@@ -243,6 +269,11 @@ def main():
         print("   Example: python test_api.py test2.m4a")
 
 
+def main():
+    """Main test function"""
+    asyncio.run(run_tests())
+
+
 if __name__ == "__main__":
     main()
 
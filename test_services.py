@@ -11,6 +11,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from services.transcription import transcribe_audio_file
 from services.filler_detection import detect_filler_words_with_gpt, remove_filler_words
+from services.wpm_calculation import calculate_wpm
 
 
 async def test_transcription(audio_file_path: str):
@@ -127,11 +128,11 @@ async def test_with_audio_file(audio_file_path: str):
     # Step 3: Clean text
     cleaned_text = test_text_cleaning(text, filler_words)
     
-    # WPM summary (based on audio duration)
-    word_count = len(text.split())
-    wpm = None
-    if isinstance(duration_seconds, (int, float)) and duration_seconds > 0:
-        wpm = (word_count / duration_seconds) * 60.0
+    # WPM summary (based on audio duration), same word count as the API
+    has_duration = isinstance(duration_seconds, (int, float)) and duration_seconds > 0
+    wpm_data = calculate_wpm(text, duration_seconds if has_duration else 0.0)
+    word_count = wpm_data["word_count"]
+    wpm = wpm_data["wpm"] if has_duration else None
 
     # Summary
     print("\n" + "="*60)
@@ -4,9 +4,10 @@ Test script to verify the full pipeline including TTS functionality
 """
 import os
 import base64
-import requests
-from pydub import AudioSegment
-from pydub.playback import play
+import subprocess
+import tempfile
+from typing import Tuple
+import httpx
 
 # Configuration
 BASE_URL = "http://localhost:8000"
@@ -16,38 +17,66 @@ OUTPUT_DIR = "test_output"
 LEVEL = "medium"
 CATEGORY = "interview"
 TITLE = "Tell me about yourself."
+MIN_AUDIO_BYTES = 1024  # smaller files can't hold real speech; rejected before uploading
+B64_DECODE_CHUNK_CHARS = 64 * 1024  # multiple of 4
+PLAY_TTS = os.getenv("PLAY_TTS", "0") == "1"  # play the TTS audio (off for automated runs)
 
-def convert_to_wav_if_needed(audio_path: str) -> str:
-    """Convert audio to WAV format if needed"""
-    if audio_path.lower().endswith('.m4a'):
+def convert_to_wav_if_needed(audio_path: str) -> Tuple[str, str]:
+    """
+    Convert audio to WAV format if needed (decided by the file's magic bytes, not its extension).
+    Returns (path, MIME type); the path is a new temp file only when a conversion happened.
+    """
+    with open(audio_path, 'rb') as fh:
+        head = fh.read(12)
+    if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+        return audio_path, 'audio/wav'  # already WAV, whatever the name says
+    if head[4:8] == b'ftyp':  # MP4 container (M4A)
         print("Converting M4A to WAV for better compatibility...")
-        wav_path = os.path.splitext(audio_path)[0] + '.wav'
-        audio = AudioSegment.from_file(audio_path, format='m4a')
-        audio.export(wav_path, format='wav')
-        return wav_path
-    return audio_path
+        # Always a distinct file, so an M4A named *.wav is never overwritten by its own conversion
+        fd, wav_path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        try:
+            # ffmpeg streams decode -> 16-bit PCM WAV itself (pydub would hold every sample in Python)
+            subprocess.run(
+                ['ffmpeg', '-loglevel', 'error', '-y', '-i', audio_path, '-f', 'wav', '-acodec', 'pcm_s16le', wav_path],
+                check=True,
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            os.remove(wav_path)
+            print(f"Conversion failed ({e}); sending the original file")
+            return audio_path, 'audio/m4a'
+        return wav_path, 'audio/wav'
+    return audio_path, 'audio/m4a'
 
-def test_full_pipeline(audio_file_path: str, output_dir: str = OUTPUT_DIR):
+def test_full_pipeline(client: httpx.Client, audio_file_path: str, output_dir: str = OUTPUT_DIR):
     """
     Test the full pipeline including TTS functionality
+    (client: shared keep-alive httpx client, owned and closed by the caller)
     """
     # Create output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
     
     print(f"Testing with file: {audio_file_path}")
+    if not os.path.exists(audio_file_path) or os.path.getsize(audio_file_path) < MIN_AUDIO_BYTES:
+        print(f"Error: audio file missing, empty or truncated: {audio_file_path}")
+        return
     
     # Convert to WAV if needed
-    converted_audio = convert_to_wav_if_needed(audio_file_path)
+    converted_audio, mime_type = convert_to_wav_if_needed(audio_file_path)
     use_temp_file = converted_audio != audio_file_path
+    playback = None
     
     try:
-        # Prepare the request with explicit MIME type
+        # Prepare the request with explicit MIME type (and the original name, not the temp file's)
+        upload_name = os.path.basename(audio_file_path)
+        if use_temp_file:
+            upload_name = os.path.splitext(upload_name)[0] + '.wav'
         with open(converted_audio, 'rb') as f:
             files = {
                 'file': (
-                    os.path.basename(converted_audio),
+                    upload_name,
                     f,
-                    'audio/wav' if converted_audio.endswith('.wav') else 'audio/m4a'
+                    mime_type
                 )
             }
             data = {
@@ -57,7 +86,8 @@ def test_full_pipeline(audio_file_path: str, output_dir: str = OUTPUT_DIR):
             }
             
             print("Sending request to API...")
-            response = requests.post(API_ENDPOINT, files=files, data=data)
+            # httpx streams the file from disk in chunks (requests builds the whole body in memory)
+            response = client.post(API_ENDPOINT, files=files, data=data)
         
         if response.status_code != 200:
             print(f"Error: {response.status_code}")
@@ -87,22 +117,42 @@ def test_full_pipeline(audio_file_path: str, output_dir: str = OUTPUT_DIR):
         # Save and play TTS audio if available
         if data.get("tts_speech"):
             tts_data = data["tts_speech"]
-            audio_data = base64.b64decode(tts_data["audio_content"])
+            audio_content = tts_data["audio_content"]
             output_file = f"{output_dir}/improved_speech.mp3"
             
+            # Decode piece by piece (4-character groups decode independently), so the whole
+            # MP3 is never held in memory next to its base64 text
             with open(output_file, "wb") as f:
-                f.write(audio_data)
+                for start in range(0, len(audio_content), B64_DECODE_CHUNK_CHARS):
+                    f.write(base64.b64decode(audio_content[start:start + B64_DECODE_CHUNK_CHARS]))
             
             print(f"\nSaved TTS audio to: {output_file}")
             
-            # Try to play the audio
-            try:
-                print("Playing TTS audio...")
-                audio = AudioSegment.from_mp3(output_file)
-                play(audio)
-            except Exception as e:
-                print(f"Could not play audio: {str(e)}")
-                print("You can find the audio file at:", output_file)
+            # Try to play the audio (PLAY_TTS=1)
+            if not PLAY_TTS:
+                print("Playback skipped (set PLAY_TTS=1 to play it)")
+            else:
+                try:
+                    print("Playing TTS audio...")
+                    # Imported only for playback: pydub pulls in audioop and probes for ffmpeg
+                    from pydub import AudioSegment
+                    audio = AudioSegment.from_mp3(output_file)
+                    try:
+                        import simpleaudio
+                    except ImportError:
+                        from pydub.playback import play
+                        play(audio)  # blocks until the audio ends
+                    else:
+                        # Non-blocking: cleanup runs while it plays; waited for at the end
+                        playback = simpleaudio.play_buffer(
+                            audio.raw_data,
+                            num_channels=audio.channels,
+                            bytes_per_sample=audio.sample_width,
+                            sample_rate=audio.frame_rate,
+                        )
+                except Exception as e:
+                    print(f"Could not play audio: {str(e)}")
+                    print("You can find the audio file at:", output_file)
         else:
             print("\nNo TTS audio data in response")
             
@@ -110,7 +160,10 @@ def test_full_pipeline(audio_file_path: str, output_dir: str = OUTPUT_DIR):
         # Clean up temporary converted file if it was created
         if use_temp_file and os.path.exists(converted_audio):
             os.remove(converted_audio)
+        if playback is not None:
+            playback.wait_done()
 
 if __name__ == "__main__":
-    # Test with the specified audio file
-    test_full_pipeline(AUDIO_FILE)
\ No newline at end of file
+    # Test with the specified audio file (no timeout: processing is slow)
+    with httpx.Client(timeout=None) as client:
+        test_full_pipeline(client, AUDIO_FILE)
\ No newline at end of file
@@ -2,6 +2,9 @@
 Test script for WPM calculation service
 """
 import asyncio
+import bisect
+import logging
+import math
 import os
 import sys
 from pathlib import Path
@@ -12,14 +15,38 @@ sys.path.insert(0, str(Path(__file__).parent))
 from services.transcription import transcribe_audio_file
 from services.wpm_calculation import calculate_wpm, count_words
 
+logger = logging.getLogger(__name__)
+
+# Output banners
+_BANNER = "=" * 60
+_HEADER = "\n" + _BANNER
+_FOOTER = _BANNER + "\n"
+_EMOJI_BANNER = "🧪" * 30
+
+# WPM interpretation bands: slow < 100 <= normal <= 150 < fast <= 200 < very fast.
+# bisect_right counts the bounds <= wpm; the 150 and 200 bounds are nudged to the next float
+# up so that exactly 150 / 200 still fall in the lower band.
+_WPM_BOUNDS = (100, math.nextafter(150, math.inf), math.nextafter(200, math.inf))
+_WPM_LABELS = (
+    "Slow speech (typical: 100-150 WPM)",
+    "Normal speech rate (typical: 100-150 WPM)",
+    "Fast speech (typical: 150-200 WPM)",
+    "Very fast speech (over 200 WPM)",
+)
+
+
+def wpm_interpretation(wpm: float) -> str:
+    """Speaking-rate label for a WPM value"""
+    return _WPM_LABELS[bisect.bisect_right(_WPM_BOUNDS, wpm)]
+
 
 async def test_wpm_calculation(audio_file_path: str):
     """
     Test WPM calculation with audio file
     """
-    print("\n" + "="*60)
+    print(_HEADER)
     print("📊 TESTING WPM CALCULATION")
-    print("="*60)
+    print(_BANNER)
     
     if not os.path.exists(audio_file_path):
         print(f"❌ Error: Audio file not found: {audio_file_path}")
@@ -34,44 +61,38 @@ async def test_wpm_calculation(audio_file_path: str):
         text = result["text"]
         duration_seconds = result["duration_seconds"]
         
-        print("\n✅ Transcription successful!")
+        print(f"\n✅ Transcription successful! ({audio_file_path})")
         print(f"\n📝 Transcribed text:\n{text}\n")
         
         # Calculate WPM
         wpm_data = calculate_wpm(text, duration_seconds)
+        word_count = wpm_data['word_count']
+        wpm = wpm_data['wpm']
         
-        print("="*60)
+        print(_BANNER)
         print("📊 WPM CALCULATION RESULTS")
-        print("="*60)
+        print(_BANNER)
         print(f"⏱️  Duration: {wpm_data['duration_seconds']} seconds")
-        print(f"📝 Word count: {wpm_data['word_count']} words")
-        print(f"🚀 WPM (Words Per Minute): {wpm_data['wpm']}")
-        print("="*60)
+        print(f"📝 Word count: {word_count} words")
+        print(f"🚀 WPM (Words Per Minute): {wpm}")
+        print(_BANNER)
         
-        # Additional analysis
-        if duration_seconds > 0:
-            words_per_second = wpm_data['word_count'] / duration_seconds
+        # Additional analysis (needs both words and duration: no division by zero)
+        if word_count > 0 and duration_seconds > 0:
+            words_per_second = word_count / duration_seconds
             print(f"\n📈 Additional metrics:")
             print(f"   Words per second: {words_per_second:.2f}")
-            print(f"   Average time per word: {duration_seconds / wpm_data['word_count']:.2f} seconds")
+            print(f"   Average time per word: {duration_seconds / word_count:.2f} seconds")
         
         # WPM interpretation
         print(f"\n💡 WPM Interpretation:")
-        if wpm_data['wpm'] < 100:
-            print("   Slow speech (typical: 100-150 WPM)")
-        elif wpm_data['wpm'] <= 150:
-            print("   Normal speech rate (typical: 100-150 WPM)")
-        elif wpm_data['wpm'] <= 200:
-            print("   Fast speech (typical: 150-200 WPM)")
-        else:
-            print("   Very fast speech (over 200 WPM)")
+        print(f"   {wpm_interpretation(wpm)}")
         
         return wpm_data
     
-    except Exception as e:
-        print(f"❌ Error during WPM calculation: {str(e)}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        # Traceback formatted only if a handler emits it (silence with a higher log level)
+        logger.exception("❌ Error during WPM calculation for %s", audio_file_path)
         return None
 
 
@@ -79,9 +100,9 @@ def test_wpm_with_text_only(text: str, duration_seconds: float):
     """
     Test WPM calculation with text only (no audio file)
     """
-    print("\n" + "="*60)
+    print(_HEADER)
     print("📊 TESTING WPM CALCULATION (TEXT ONLY)")
-    print("="*60)
+    print(_BANNER)
     
     print(f"📝 Text: {text}")
     print(f"⏱️  Duration: {duration_seconds} seconds\n")
@@ -89,13 +110,13 @@ def test_wpm_with_text_only(text: str, duration_seconds: float):
     try:
         wpm_data = calculate_wpm(text, duration_seconds)
         
-        print("="*60)
+        print(_BANNER)
         print("📊 WPM CALCULATION RESULTS")
-        print("="*60)
+        print(_BANNER)
         print(f"📝 Word count: {wpm_data['word_count']} words")
         print(f"⏱️  Duration: {wpm_data['duration_seconds']} seconds")
         print(f"🚀 WPM (Words Per Minute): {wpm_data['wpm']}")
-        print("="*60 + "\n")
+        print(_FOOTER)
         
         return wpm_data
     
@@ -104,19 +125,26 @@ def test_wpm_with_text_only(text: str, duration_seconds: float):
         return None
 
 
+async def test_wpm_calculation_files(audio_file_paths: list):
+    """
+    Test WPM calculation with several audio files at once. Transcriptions run concurrently,
+    capped by WHISPER_CONCURRENCY inside transcribe_audio_file.
+    """
+    return await asyncio.gather(*(test_wpm_calculation(path) for path in audio_file_paths))
+
+
 def main():
     """
     Main test function
     """
-    print("\n" + "🧪"*30)
+    print("\n" + _EMOJI_BANNER)
     print("WPM CALCULATION TEST SCRIPT")
-    print("🧪"*30)
+    print(_EMOJI_BANNER)
     
-    # Check if audio file path provided
+    # Check if audio file paths provided
     if len(sys.argv) > 1:
-        audio_file_path = sys.argv[1]
-        # Test with audio file
-        asyncio.run(test_wpm_calculation(audio_file_path))
+        # Test with audio file(s)
+        asyncio.run(test_wpm_calculation_files(sys.argv[1:]))
     else:
         # Test with sample text
         sample_text = "So, um, I think that, you know, the project is basically ready. Well, actually, I mean, it's sort of working, but, like, we need to test it more, right?"
@@ -124,7 +152,7 @@ def main():
         
         print("\n📝 Using sample text for testing...")
         print("💡 Tip: Provide an audio file path as argument to test with real audio")
-        print("   Example: python test_wpm.py audio.m4a\n")
+        print("   Example: python test_wpm.py audio.m4a [more.m4a ...]\n")
         
         test_wpm_with_text_only(sample_text, sample_duration)
 